@@ -0,0 +1,211 @@
+"""
+Offline check of Spotify link resolution against a local stub of the Web API
+
+Serves the token endpoint and paged playlist/album/track endpoints from an
+aiohttp app on loopback, points SpotifyClient at it through the same
+SPOTIFY_API_BASE / SPOTIFY_ACCOUNTS_BASE settings the bot reads, and stubs the
+YouTube search. Music._resolve_spotify is then run twice per link: the first
+resolve must search and store every mapping once, the second must be served
+from SQLite without a single search.
+
+Run from the repository root:
+
+    python -m benchmarks.spotify_stub
+    python -m benchmarks.spotify_stub --playlist-size 180 --page-size 50
+
+The exit status is 1 when any check fails.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+
+import cogs.music as music_module
+from database import Database
+from utils.spotify import SpotifyClient, parse_spotify_url
+
+PLAYLIST_ID = "37i9dQZF1DXcBWIGoYBM5M"
+ALBUM_ID = "4aawyAB9vmqN3uQ7FjRGTy"
+TRACK_ID = "11dFghVXANMlKmJXsNCbNl"
+
+
+def stub_track(index: int) -> Dict[str, Any]:
+    return {
+        "id": f"{index:022d}",
+        "type": "track",
+        "name": f"Song {index}",
+        "artists": [{"name": f"Artist {index % 7}"}],
+        "duration_ms": 180_000 + index,
+    }
+
+
+class SpotifyStub:
+    """Token, track, album and playlist endpoints with Spotify's offset/limit/next paging"""
+
+    def __init__(self, playlist_size: int, page_size: int):
+        self.playlist = [{"track": stub_track(i)} for i in range(playlist_size)]
+        # Local files and removed songs come back as null tracks and must be skipped
+        self.playlist.insert(playlist_size // 2, {"track": None})
+        self.album = [stub_track(1000 + i) for i in range(12)]
+        self.page_size = page_size
+        self.requests: Dict[str, int] = {}
+        self.base_url = ""
+
+    def _count(self, name: str):
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    def _authorized(self, request: web.Request) -> bool:
+        return request.headers.get("Authorization") == "Bearer stub-token"
+
+    async def token(self, request: web.Request) -> web.Response:
+        self._count("token")
+        form = await request.post()
+        if form.get("grant_type") != "client_credentials" or not request.headers.get("Authorization", "").startswith("Basic "):
+            return web.json_response({"error": "invalid_client"}, status=400)
+        return web.json_response({"access_token": "stub-token", "token_type": "Bearer", "expires_in": 3600})
+
+    def _page(self, request: web.Request, path: str, items: List[Dict[str, Any]]) -> web.Response:
+        offset = int(request.query.get("offset", 0))
+        limit = min(int(request.query.get("limit", 20)), self.page_size)
+        end = offset + limit
+        following = f"{self.base_url}/v1{path}?offset={end}&limit={limit}" if end < len(items) else None
+        return web.json_response({"items": items[offset:end], "total": len(items), "next": following})
+
+    async def playlist_tracks(self, request: web.Request) -> web.Response:
+        self._count("playlist_page")
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        if request.match_info["id"] != PLAYLIST_ID:
+            return web.json_response({}, status=404)
+        return self._page(request, f"/playlists/{PLAYLIST_ID}/tracks", self.playlist)
+
+    async def album_tracks(self, request: web.Request) -> web.Response:
+        self._count("album_page")
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        return self._page(request, f"/albums/{ALBUM_ID}/tracks", self.album)
+
+    async def track(self, request: web.Request) -> web.Response:
+        self._count("track")
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        return web.json_response(stub_track(int(request.match_info["id"]) if request.match_info["id"].isdigit() else 5000))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/token", self.token)
+        app.router.add_get("/v1/playlists/{id}/tracks", self.playlist_tracks)
+        app.router.add_get("/v1/albums/{id}/tracks", self.album_tracks)
+        app.router.add_get("/v1/tracks/{id}", self.track)
+        return app
+
+
+class StubSearch:
+    """Stands in for the ytsearch1 extractor; every query maps to a stable fake video id"""
+
+    def __init__(self):
+        self.queries: List[str] = []
+        self._lock = threading.Lock()
+
+    def extract_info(self, query: str, download: bool = False) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.queries.append(query)
+            number = len(self.queries)
+        return {"entries": [{"id": f"vid{number:08d}", "title": query, "duration": 180}]}
+
+
+async def check(args) -> List[str]:
+    workdir = tempfile.mkdtemp(prefix="spotify-stub-")
+    stub = SpotifyStub(args.playlist_size, args.page_size)
+    runner = web.AppRunner(stub.app())
+    failures: List[str] = []
+    try:
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        stub.base_url = f"http://127.0.0.1:{port}"
+
+        # Keep the check away from the bot's real database
+        music_module.Database = lambda: Database(os.path.join(workdir, "stub.db"))
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        music = music_module.Music(bot)
+        music.spotify = SpotifyClient(
+            "stub-id", "stub-secret",
+            api_base=f"{stub.base_url}/v1", accounts_base=stub.base_url,
+            max_tracks=music_module.SPOTIFY_MAX_TRACKS
+        )
+        search = StubSearch()
+        music.search_ytdl = search
+
+        links = {
+            "playlist": f"https://open.spotify.com/playlist/{PLAYLIST_ID}?si=abc",
+            "album": f"spotify:album:{ALBUM_ID}",
+            "track": f"https://open.spotify.com/intl-pt/track/{TRACK_ID}",
+        }
+        expected = {
+            "playlist": min(args.playlist_size, music_module.SPOTIFY_MAX_TRACKS),
+            "album": len(stub.album),
+            "track": 1,
+        }
+        for kind, link in links.items():
+            parsed = parse_spotify_url(link)
+            searches_before = len(search.queries)
+            first = await music._resolve_spotify(*parsed)
+            searched = len(search.queries) - searches_before
+            second = await music._resolve_spotify(*parsed)
+            repeated = len(search.queries) - searches_before - searched
+            print(f"{kind:<9} tracks={len(first):<4} searches first={searched:<4} second={repeated}")
+
+            if len(first) != expected[kind]:
+                failures.append(f"{kind}: resolved {len(first)} tracks, expected {expected[kind]}")
+            if searched != expected[kind]:
+                failures.append(f"{kind}: first resolve ran {searched} searches, expected {expected[kind]}")
+            if repeated:
+                failures.append(f"{kind}: second resolve ran {repeated} searches instead of reading SQLite")
+            if [t["webpage_url"] for t in first] != [t["webpage_url"] for t in second]:
+                failures.append(f"{kind}: second resolve mapped to different videos")
+
+        stored = music.db.get_spotify_mappings([stub_track(i)["id"] for i in range(expected["playlist"])])
+        if len(stored) != expected["playlist"]:
+            failures.append(f"playlist: {len(stored)} mappings in SQLite, expected {expected['playlist']}")
+        pages = -(-min(len(stub.playlist), music_module.SPOTIFY_MAX_TRACKS + 1) // args.page_size)
+        print(f"requests  {stub.requests}")
+        if stub.requests.get("token") != 1:
+            failures.append(f"token requested {stub.requests.get('token')} times, expected once")
+        if stub.requests.get("playlist_page", 0) > 2 * pages:
+            failures.append(f"{stub.requests['playlist_page']} playlist pages fetched for two resolves of {pages} pages")
+
+        await music.spotify.close()
+        return failures
+    finally:
+        await runner.cleanup()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spotify resolution check against a local Web API stub")
+    parser.add_argument("--playlist-size", type=int, default=130, help="tracks in the stub playlist")
+    parser.add_argument("--page-size", type=int, default=50, help="largest page the stub returns")
+    args = parser.parse_args()
+
+    failures = asyncio.run(check(args))
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Offline time-to-first-audio benchmark for the music pipeline
+
+Generates short audio files, serves them from a loopback HTTP server and stubs
+YoutubeDL so extraction returns their URLs. Each run drives the real
+Music._resolve_track and Music._create_source (FFmpeg spawn, ffprobe for
+unknown codecs) and reads until the first Opus frame, then p50/p95 are
+reported for every pipeline stage.
+
+Run from the repository root (needs ffmpeg and ffprobe on PATH):
+
+    python -m benchmarks.ttfa --runs 20
+    python -m benchmarks.ttfa --extract-delay 0.8 --max-p95 play_to_audio=2.5
+
+With --max-p95 the exit status is 1 when a stage is slower than its budget,
+so it can gate a deploy.
+"""
+
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+import cogs.music as music_module
+from database import Database
+from utils.audio_sources import MonitoredSource
+
+# name: (file, ffmpeg encoder args, acodec reported by the stub extractor)
+CASES = {
+    "opus_copy": ("tone.webm", ["-c:a", "libopus", "-b:a", "96k"], "opus"),
+    "aac_transcode": ("tone.m4a", ["-c:a", "aac", "-b:a", "128k"], "mp4a.40.2"),
+    "unknown_probe": ("tone.wav", ["-c:a", "pcm_s16le"], None),
+}
+TONE_SECONDS = 10
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static files with single-range support, so FFmpeg can seek like it does on real CDNs
+
+    MP4/M4A keeps its index at the end of the file; without Range the stdlib server
+    answers every seek with the whole file from byte 0 and FFmpeg decodes garbage.
+    """
+
+    def send_head(self):
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if not match or not any(match.groups()):
+            return super().send_head()
+        path = self.translate_path(self.path)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        size = os.fstat(f.fileno()).st_size
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last) if last else size - 1, size - 1)
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return None
+        try:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        finally:
+            f.close()
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        return io.BytesIO(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # FFmpeg drops connections when it seeks or is cleaned up mid-read
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class StubYoutubeDL:
+    """Answers extract_info from a fixed table after an optional simulated network delay"""
+
+    def __init__(self, base_url: str, delay: float):
+        self.base_url = base_url
+        self.delay = delay
+
+    def extract_info(self, query: str, download: bool = False) -> Optional[Dict[str, Any]]:
+        time.sleep(self.delay)
+        case = CASES.get(query)
+        if not case:
+            return None
+        filename, _, acodec = case
+        return {
+            "title": query,
+            "webpage_url": f"https://example.invalid/{query}",
+            "url": f"{self.base_url}/{filename}",
+            "acodec": acodec,
+            "duration": TONE_SECONDS,
+        }
+
+
+def generate_audio(directory: str):
+    for filename, codec_args, _ in CASES.values():
+        subprocess.run(
+            ["ffmpeg", "-f", "lavfi", "-i", f"sine=frequency=440:duration={TONE_SECONDS}",
+             *codec_args, "-loglevel", "error", "-y", os.path.join(directory, filename)],
+            check=True,
+        )
+
+
+async def run_case(music: music_module.Music, case: str):
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    tracks = await music._resolve_track(case)
+    track = tracks[0]
+    source = await music._create_source(track, track["url"], None)
+    spawned = time.monotonic()
+    monitored = MonitoredSource(source)
+    try:
+        data = await loop.run_in_executor(None, monitored.read)
+        if not data:
+            raise RuntimeError(f"{case}: FFmpeg produced no audio")
+        music._record_stage("first_frame", monitored.first_frame_at - spawned)
+        music._record_stage("play_to_audio", monitored.first_frame_at - started)
+    finally:
+        monitored.cleanup()
+
+
+async def benchmark(args) -> Dict[str, Dict[str, Dict[str, float]]]:
+    workdir = tempfile.mkdtemp(prefix="ttfa-")
+    server = None
+    try:
+        generate_audio(workdir)
+        server = QuietServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=workdir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        # Keep the benchmark away from the bot's real database
+        music_module.Database = lambda: Database(os.path.join(workdir, "bench.db"))
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+
+        report = {}
+        for case in args.cases:
+            music = music_module.Music(bot)
+            music.ytdl = StubYoutubeDL(base_url, args.extract_delay)
+            for _ in range(args.runs):
+                await run_case(music, case)
+            report[case] = {}
+            for stage in music_module.PIPELINE_STAGES:
+                samples = music.stage_timings[stage]
+                result = music._percentiles(samples)
+                if result:
+                    report[case][stage] = {"n": len(samples), "p50": result[0], "p95": result[1]}
+        return report
+    finally:
+        if server:
+            server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(report: Dict[str, Dict[str, Dict[str, float]]]):
+    for case, stages in report.items():
+        print(f"\n{case}")
+        print(f"  {'stage':<15}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}")
+        for stage, values in stages.items():
+            print(f"  {stage:<15}{values['n']:>5}{values['p50'] * 1000:>10.1f}{values['p95'] * 1000:>10.1f}")
+
+
+def check_budgets(report: Dict[str, Dict[str, Dict[str, float]]], budgets: List[str]) -> List[str]:
+    failures = []
+    for budget in budgets:
+        stage, _, limit = budget.partition("=")
+        for case, stages in report.items():
+            if stage in stages and stages[stage]["p95"] > float(limit):
+                failures.append(f"{case}/{stage}: p95 {stages[stage]['p95']:.3f}s > {float(limit):.3f}s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-audio benchmark for the music pipeline")
+    parser.add_argument("--runs", type=int, default=10, help="runs per case")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--extract-delay", type=float, default=0.0, help="simulated yt-dlp latency in seconds")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-p95", action="append", default=[], metavar="STAGE=SECONDS",
+                        help="fail when a stage's p95 exceeds the budget (repeatable)")
+    args = parser.parse_args()
+
+    missing = [tool for tool in ("ffmpeg", "ffprobe") if not shutil.which(tool)]
+    if missing:
+        sys.exit(f"{' and '.join(missing)} not found on PATH; install FFmpeg to run this benchmark")
+
+    try:
+        report = asyncio.run(benchmark(args))
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"ffmpeg could not generate the test audio ({' '.join(e.cmd[:8])} ...); it needs the libopus and aac encoders")
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_budgets(report, args.max_p95)
+    if failures:
+        print("\nOver budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
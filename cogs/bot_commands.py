@@ -899,6 +899,8 @@ class Basic(commands.Cog):
                 ("write <message>", "ecoar mensagem"),
                 ("clear [amount]", "apagar mensagens do canal"),
                 ("addxp @user <value>", "adicionar XP a um utilizador"),
+                ("musicstats", "estatísticas do sistema de música"),
+                ("toptracks [dias]", "músicas mais tocadas no servidor"),
             ]
 
             music = [
@@ -909,6 +911,9 @@ class Basic(commands.Cog):
                 ("pause / pz", "pausar"),
                 ("resume / r", "retomar"),
                 ("queue / q", "mostrar fila"),
+                ("radio_start <nome> <term>", "criar uma rádio partilhada"),
+                ("radio_join <nome>", "ouvir uma rádio"),
+                ("radio_leave / radio_list", "sair / listar rádios"),
                 ("testtone / tone", "testar áudio com tom"),
                 ("music", "mostrar comandos de música"),
             ]
@@ -919,19 +924,26 @@ class Basic(commands.Cog):
             ]
 
             games = [
-                ("termo", "começa um novo jogo de Termo"),
+                ("termo [4-7]", "começa um novo jogo de Termo (4 a 7 letras)"),
                 ("termo_quit / quit", "sai do jogo atual"),
+                ("termo_hint / dica", "sugere a melhor próxima tentativa"),
+                ("termo_diario / diario", "palavra do dia do servidor"),
+                ("termo_hoje", "resultados do Termo diário"),
+                ("termo_corrida / corrida [4-7]", "corrida: todos no canal adivinham a mesma palavra"),
+                ("termo_corrida_parar / parar_corrida", "termina a corrida do canal"),
                 ("termo_stats / stats [@user]", "estatísticas do Termo"),
                 ("termo_rank", "ranking do Termo"),
             ]
 
             quick_games = [
                 ("ppt <pedra|papel|tesoura>", "pedra, papel ou tesoura"),
-                ("dado [lados]", "rola um dado de N lados"),
+                ("dado [lados|expressão]", "rola dados: 4d6kh3, 2d20+5, 3d6!, 8d10r2"),
+                ("dado stats <expressão>", "distribuição exata de uma rolagem"),
                 ("moeda", "atira uma moeda ao ar"),
                 ("escolher <op1> <op2> ...", "deixa o bot escolher"),
                 ("8ball <pergunta>", "pergunta à bola mágica"),
                 ("adivinhar <número>", "adivinha o número (1-10)"),
+                ("jogos_rank <jogo>", "ranking de ppt, adivinhar, dado ou moeda"),
                 ("jogos", "mostra todos os jogos"),
             ]
 
@@ -986,6 +998,9 @@ class Basic(commands.Cog):
                 ("pause / pz", "pausar"),
                 ("resume / r", "retomar"),
                 ("queue / q", "mostrar fila"),
+                ("radio_start <nome> <term>", "criar uma rádio partilhada"),
+                ("radio_join <nome>", "ouvir uma rádio"),
+                ("radio_leave / radio_list", "sair / listar rádios"),
                 ("testtone / tone", "testar áudio com tom"),
                 ("music", "mostrar comandos de música"),
             ]
@@ -996,19 +1011,26 @@ class Basic(commands.Cog):
             ]
 
             games = [
-                ("termo", "começa um novo jogo de Termo"),
+                ("termo [4-7]", "começa um novo jogo de Termo (4 a 7 letras)"),
                 ("termo_quit / quit", "sai do jogo atual"),
+                ("termo_hint / dica", "sugere a melhor próxima tentativa"),
+                ("termo_diario / diario", "palavra do dia do servidor"),
+                ("termo_hoje", "resultados do Termo diário"),
+                ("termo_corrida / corrida [4-7]", "corrida: todos no canal adivinham a mesma palavra"),
+                ("termo_corrida_parar / parar_corrida", "termina a corrida do canal"),
                 ("termo_stats / stats [@user]", "estatísticas do Termo"),
                 ("termo_rank", "ranking do Termo"),
             ]
 
             quick_games = [
                 ("ppt <pedra|papel|tesoura>", "pedra, papel ou tesoura"),
-                ("dado [lados]", "rola um dado de N lados"),
+                ("dado [lados|expressão]", "rola dados: 4d6kh3, 2d20+5, 3d6!, 8d10r2"),
+                ("dado stats <expressão>", "distribuição exata de uma rolagem"),
                 ("moeda", "atira uma moeda ao ar"),
                 ("escolher <op1> <op2> ...", "deixa o bot escolher"),
                 ("8ball <pergunta>", "pergunta à bola mágica"),
                 ("adivinhar <número>", "adivinha o número (1-10)"),
+                ("jogos_rank <jogo>", "ranking de ppt, adivinhar, dado ou moeda"),
                 ("jogos", "mostra todos os jogos"),
             ]
 
@@ -1,11 +1,68 @@
+import asyncio
+import logging
 import random
+import re
+from typing import List, Tuple
+
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+
+from database import Database
+from utils import dice
+
+# Outcomes are buffered and written in one transaction every few seconds (or once the batch fills)
+STATS_FLUSH_SECONDS = 15
+STATS_BATCH_SIZE = 100
+
+# Dice rolls list every die up to this many; bigger rolls only show subtotals
+DICE_SHOWN = 30
+DICE_HISTOGRAM_ROWS = 12
+
+# Games with a leaderboard: key stored in the database -> (title, aliases)
+RANKED_GAMES = {
+    "ppt": ("🪨📄✂️ Pedra, Papel, Tesoura", ["ppt", "rps", "pedrapapeltesoura"]),
+    "adivinhar": ("🎲 Adivinhar Número", ["adivinhar", "guess", "numero"]),
+    "dado": ("🎲 Rolar Dado", ["dado", "dice", "roll"]),
+    "moeda": ("🪙 Atirar Moeda", ["moeda", "coin", "flip"]),
+}
 
 
 class Games(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.db = Database()
+        self._pending_results: List[Tuple[int, int, str, str]] = []  # (guild_id, user_id, game, outcome)
+
+    async def cog_load(self):
+        self._flush_results.start()
+
+    async def cog_unload(self):
+        self._flush_results.cancel()
+        self._write_results(self._pending_results)
+        self._pending_results = []
+
+    def _record(self, ctx: commands.Context, game: str, outcome: str):
+        """Queue a game outcome ("win", "loss", "draw" or "play"); commands never wait on the database"""
+        if not ctx.guild:
+            return
+        self._pending_results.append((ctx.guild.id, ctx.author.id, game, outcome))
+        if len(self._pending_results) >= STATS_BATCH_SIZE:
+            results, self._pending_results = self._pending_results, []
+            asyncio.get_event_loop().run_in_executor(None, self._write_results, results)
+
+    def _write_results(self, results: List[Tuple[int, int, str, str]]):
+        """Write a batch of outcomes in one transaction (safe to run in an executor)"""
+        if not results:
+            return
+        try:
+            self.db.add_game_results(results)
+        except Exception:
+            logging.exception("Failed to write %s game results", len(results))
+
+    @tasks.loop(seconds=STATS_FLUSH_SECONDS)
+    async def _flush_results(self):
+        results, self._pending_results = self._pending_results, []
+        await asyncio.get_running_loop().run_in_executor(None, self._write_results, results)
         
     @commands.command(name='ppt', aliases=['pedrapapeltesoura', 'rps'])
     async def pedra_papel_tesoura(self, ctx, escolha: str = None):
@@ -73,6 +130,7 @@ class Games(commands.Cog):
         embed.add_field(name="Eu escolhi", value=f"{opcoes[escolha_bot]} {escolha_bot.capitalize()}", inline=True)
         
         await ctx.send(embed=embed)
+        self._record(ctx, "ppt", {"vitoria": "win", "derrota": "loss", "empate": "draw"}[resultado])
     
     def _determinar_vencedor_ppt(self, jogador, bot):
         """Determina o vencedor do jogo pedra-papel-tesoura"""
@@ -89,15 +147,22 @@ class Games(commands.Cog):
             return 'vitoria'
         return 'derrota'
     
-    @commands.command(name='dado', aliases=['dice', 'roll'])
-    async def rolar_dado(self, ctx, lados: int = 6):
-        """Rola um dado! Uso: L!dado [número de lados]"""
+    @commands.group(name='dado', aliases=['dice', 'roll'], invoke_without_command=True)
+    async def rolar_dado(self, ctx, *, expressao: str = "6"):
+        """Rola dados! Uso: L!dado [lados] ou L!dado <expressão> (ex.: 4d6kh3, 2d20+5, 3d6!, 8d10r2)"""
+        expressao = expressao.strip()
+        if not re.fullmatch(r"-?\d+", expressao):
+            await self._rolar_expressao(ctx, expressao)
+            return
+
+        # Só um número: um dado com esse número de lados, como sempre
+        lados = int(expressao)
         if lados < 2:
             await ctx.send("❌ O dado precisa ter pelo menos 2 lados!")
             return
         
-        if lados > 100:
-            await ctx.send("❌ Máximo de 100 lados!")
+        if lados > dice.MAX_SIDES:
+            await ctx.send(f"❌ Máximo de {dice.MAX_SIDES} lados!")
             return
         
         resultado = random.randint(1, lados)
@@ -114,6 +179,94 @@ class Games(commands.Cog):
             color=discord.Color.purple()
         )
         await ctx.send(embed=embed)
+        self._record(ctx, "dado", "play")
+
+    async def _rolar_expressao(self, ctx, expressao: str):
+        try:
+            termos = dice.parse(expressao)
+        except dice.DiceError as e:
+            await ctx.send(f"❌ {e}")
+            return
+        resultado = dice.roll(termos)
+
+        embed = discord.Embed(
+            title=f"🎲 {dice.format_terms(termos)}",
+            description=f"**Resultado: {resultado.total}**",
+            color=discord.Color.purple()
+        )
+        for rolagem in resultado.terms:
+            termo = rolagem.term
+            if termo.is_constant:
+                continue
+            if termo.count <= DICE_SHOWN:
+                dados = ", ".join(
+                    str(valor) if mantido else f"~~{valor}~~"
+                    for valor, mantido in zip(rolagem.values.tolist(), rolagem.kept.tolist())
+                )
+            else:
+                dados = f"{termo.count} dados"
+            embed.add_field(
+                name=termo.notation,
+                value=f"{dados}\n= **{rolagem.subtotal}**",
+                inline=True
+            )
+        if resultado.explosions_capped:
+            embed.set_footer(text=f"Limite de {dice.MAX_EXPLOSIONS} explosões atingido.")
+        await ctx.send(embed=embed)
+        self._record(ctx, "dado", "play")
+
+    @rolar_dado.command(name='stats', aliases=['estatisticas'])
+    async def dado_stats(self, ctx, *, expressao: str = None):
+        """Distribuição exata de uma rolagem! Uso: L!dado stats <expressão>"""
+        if not expressao:
+            await ctx.send("❌ Uso: `L!dado stats <expressão>` (ex.: `L!dado stats 4d6kh3`)")
+            return
+        expressao = expressao.strip()
+        if expressao.isdigit():
+            expressao = f"d{expressao}"
+        try:
+            termos = dice.parse(expressao)
+            # Convolution and the keep/drop DP are numpy-heavy; keep them off the event loop
+            dist = await asyncio.get_running_loop().run_in_executor(None, dice.distribution, termos)
+        except dice.DiceError as e:
+            await ctx.send(f"❌ {e}")
+            return
+
+        minimo, maximo = dice.bounds(termos)
+        embed = discord.Embed(
+            title=f"📊 {dice.format_terms(termos)}",
+            color=discord.Color.purple()
+        )
+        embed.add_field(name="Média", value=f"{dist.mean:.2f}", inline=True)
+        embed.add_field(name="Desvio Padrão", value=f"{dist.std:.2f}", inline=True)
+        embed.add_field(name="Mediana", value=str(dist.percentile(0.5)), inline=True)
+        embed.add_field(name="Mínimo", value=str(int(minimo)), inline=True)
+        embed.add_field(name="Máximo", value="∞" if maximo == float("inf") else str(int(maximo)), inline=True)
+        embed.add_field(
+            name="Mais Provável",
+            value=f"{dist.mode} ({dist.probs.max() * 100:.2f}%)",
+            inline=True
+        )
+        embed.add_field(name="Histograma", value=self._histograma(dist), inline=False)
+        await ctx.send(embed=embed)
+
+    @staticmethod
+    def _histograma(dist: "dice.Distribution") -> str:
+        """Barras de probabilidade; resultados agrupados quando há mais do que DICE_HISTOGRAM_ROWS"""
+        inicio, fim = dist.percentile(0.001), dist.percentile(0.999)
+        largura = max(1, -(-(fim - inicio + 1) // DICE_HISTOGRAM_ROWS))
+        linhas = []
+        for baixo in range(inicio, fim + 1, largura):
+            alto = min(baixo + largura - 1, fim)
+            prob = float(dist.probs[baixo - dist.offset:alto - dist.offset + 1].sum())
+            linhas.append((f"{baixo}" if baixo == alto else f"{baixo}-{alto}", prob))
+        topo = max(prob for _, prob in linhas) or 1
+        rotulo = max(len(nome) for nome, _ in linhas)
+        barras = "\n".join(
+            f"{nome:>{rotulo}} {'█' * round(prob / topo * 20):<20} {prob * 100:5.2f}%"
+            for nome, prob in linhas
+        )
+        return f"```\n{barras}\n```"
     
     @commands.command(name='moeda', aliases=['coin', 'flip'])
     async def atirar_moeda(self, ctx):
@@ -127,6 +280,7 @@ class Games(commands.Cog):
             color=discord.Color.gold()
         )
         await ctx.send(embed=embed)
+        self._record(ctx, "moeda", "play")
     
     @commands.command(name='escolher', aliases=['choose', 'pick'])
     async def escolher(self, ctx, *opcoes):
@@ -239,6 +393,70 @@ class Games(commands.Cog):
             )
         
         await ctx.send(embed=embed)
+        self._record(ctx, "adivinhar", "win" if palpite == numero_secreto else "loss")
+
+    @commands.command(name='jogos_rank', aliases=['rankjogos', 'gamesrank'])
+    async def jogos_rank(self, ctx, jogo: str = None):
+        """Mostra o ranking de um jogo rápido! Uso: L!jogos_rank <ppt|adivinhar|dado|moeda>"""
+        if not ctx.guild:
+            embed = discord.Embed(
+                title="❌ Erro",
+                description="Este comando está disponível apenas em servidores.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        chave = next(
+            (key for key, (_, aliases) in RANKED_GAMES.items() if jogo and jogo.lower() in aliases),
+            None
+        )
+        if not chave:
+            embed = discord.Embed(
+                title="🏆 Ranking dos Jogos",
+                description="Escolhe um jogo: " + ", ".join(f"`{key}`" for key in RANKED_GAMES),
+                color=discord.Color.blue()
+            )
+            embed.set_footer(text="Uso: L!jogos_rank <jogo>")
+            await ctx.send(embed=embed)
+            return
+
+        # Include outcomes still waiting in the buffer
+        results, self._pending_results = self._pending_results, []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_results, results)
+        ranking = await loop.run_in_executor(None, self.db.get_game_leaderboard, ctx.guild.id, chave, 10)
+
+        titulo = RANKED_GAMES[chave][0]
+        if not ranking:
+            embed = discord.Embed(
+                title=f"🏆 Ranking - {titulo}",
+                description="Ainda ninguém jogou este jogo neste servidor!",
+                color=discord.Color.blue()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        linhas = []
+        for i, entry in enumerate(ranking, 1):
+            member = ctx.guild.get_member(entry["user_id"])
+            nome = member.display_name if member else f"Utilizador {entry['user_id']}"
+            medalha = ["🥇", "🥈", "🥉"][i-1] if i <= 3 else f"{i}."
+            if chave in ("dado", "moeda"):
+                linhas.append(f"{medalha} **{nome}** — {entry['games']} jogadas")
+            else:
+                taxa = entry["wins"] / entry["games"] * 100 if entry["games"] else 0
+                empates = f" | 🤝 {entry['draws']}" if chave == "ppt" else ""
+                linhas.append(
+                    f"{medalha} **{nome}** — 🏆 {entry['wins']} | ❌ {entry['losses']}{empates} | 📈 {taxa:.0f}%"
+                )
+
+        embed = discord.Embed(
+            title=f"🏆 Ranking - {titulo}",
+            description="\n".join(linhas),
+            color=discord.Color.gold()
+        )
+        await ctx.send(embed=embed)
     
     @commands.command(name='jogos', aliases=['games', 'listarjogos'])
     async def listar_jogos(self, ctx):
@@ -251,11 +469,13 @@ class Games(commands.Cog):
         
         jogos = [
             ("🪨📄✂️ Pedra, Papel, Tesoura", "`L!ppt <pedra|papel|tesoura>`", "Joga o clássico jogo!"),
-            ("🎲 Rolar Dado", "`L!dado [lados]`", "Rola um dado de N lados"),
+            ("🎲 Rolar Dado", "`L!dado [lados|expressão]`", "Rola dados: 4d6kh3, 2d20+5, 3d6!, 8d10r2"),
+            ("📊 Probabilidades", "`L!dado stats <expressão>`", "Distribuição exata de uma rolagem"),
             ("🪙 Atirar Moeda", "`L!moeda`", "Cara ou coroa?"),
             ("🎯 Escolher", "`L!escolher <opção1> <opção2> ...`", "Deixa-me escolher por ti"),
             ("🔮 Bola Mágica", "`L!8ball <pergunta>`", "Faz uma pergunta ao destino"),
-            ("🎲 Adivinhar Número", "`L!adivinhar <número>`", "Adivinha o número entre 1 e 10")
+            ("🎲 Adivinhar Número", "`L!adivinhar <número>`", "Adivinha o número entre 1 e 10"),
+            ("🏆 Ranking", "`L!jogos_rank <jogo>`", "Os melhores jogadores de cada jogo")
         ]
         
         for nome, comando, descricao in jogos:
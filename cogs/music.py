@@ -1,24 +1,43 @@
 import asyncio
+import json
+import statistics
 import logging
 import os
 import shutil
-from typing import Any, Dict, List, Optional
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
 import yt_dlp
 
-from utils.components import MusicPlayerView
+from database import Database
+from utils.audio_cache import AudioCache, track_key
+from utils.audio_sources import BroadcastSource, MonitoredSource, PrewarmedSource
+from utils.components import MusicPlayerView, QueueView
+from utils.ffmpeg_budget import COPY, TRANSCODE, BudgetedSource, FFmpegBudget
+from utils.search_index import PrefixIndex, TTLCache, normalize_query
+from utils.spotify import SpotifyClient, SpotifyError, parse_spotify_url
 
 load_dotenv()
 
+# Opus sources (YouTube WebM/Opus) are remuxed with codec copy: no probe, no re-encode.
+# Other sources are transcoded at the voice channel's bitrate (see _transcode_options).
 FFMPEG_OPTIONS = {
     "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
-    "options": "-vn -b:a 128k -bufsize 512k",
+    "options": "-vn",
 }
 
+# Transcode bitrate in kbps; Discord downsamples anything above the channel bitrate anyway
+MIN_AUDIO_BITRATE = 32
+MAX_AUDIO_BITRATE = 256
+DEFAULT_AUDIO_BITRATE = 64
+BUFSIZE_FACTOR = 4
+
 FFMPEG_TONE_OPTIONS = {
     "before_options": "-f lavfi",
     "options": "-t 2 -vn",
@@ -37,32 +56,228 @@ YTDL_OPTS = {
     "extractor_args": {"youtube": {"player_client": ["android", "web"]}},
 }
 
+# Autocomplete only lists search results, it never resolves stream URLs
+SEARCH_YTDL_OPTS = {
+    "quiet": True,
+    "skip_download": True,
+    "extract_flat": True,
+    "no_warnings": True,
+    "ignoreerrors": True,
+    "source_address": "0.0.0.0",
+}
+
+# /play autocomplete: local index first, then a debounced ytsearch5 cached per prefix
+AUTOCOMPLETE_MIN_CHARS = 3
+AUTOCOMPLETE_DEBOUNCE = 0.35  # seconds a user must stop typing before a remote search
+AUTOCOMPLETE_TIMEOUT = 2.0  # Discord drops autocomplete responses after 3 seconds
+AUTOCOMPLETE_CACHE_TTL = 600
+AUTOCOMPLETE_MAX_SEARCHES = 2  # concurrent ytsearch5 calls across all users
+
+# Spotify links (optional): metadata from the Web API, audio from a YouTube search.
+# The base URLs can point at a local stub of the API.
+SPOTIFY_CLIENT_ID = os.getenv("SPOTIPY_CLIENT_ID")
+SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET")
+SPOTIFY_API_BASE = os.getenv("SPOTIFY_API_BASE", "https://api.spotify.com/v1")
+SPOTIFY_ACCOUNTS_BASE = os.getenv("SPOTIFY_ACCOUNTS_BASE", "https://accounts.spotify.com")
+SPOTIFY_MAX_TRACKS = 100
+SPOTIFY_SEARCH_CONCURRENCY = 4  # YouTube searches in flight while mapping a playlist
+
+# Opt-in local audio cache for frequently played tracks (disabled when MUSIC_CACHE_DIR is unset)
+MUSIC_CACHE_DIR = os.getenv("MUSIC_CACHE_DIR")
+MUSIC_CACHE_MAX_MB = int(os.getenv("MUSIC_CACHE_MAX_MB", "1024"))
+MUSIC_CACHE_MIN_PLAYS = int(os.getenv("MUSIC_CACHE_MIN_PLAYS", "3"))
+
+# Global FFmpeg budget shared by all guilds; transcodes have a tighter cap than codec copies
+MUSIC_MAX_FFMPEG = int(os.getenv("MUSIC_MAX_FFMPEG", "24"))
+MUSIC_MAX_TRANSCODES = int(os.getenv("MUSIC_MAX_TRANSCODES", "8"))
+MUSIC_FFMPEG_WAIT = float(os.getenv("MUSIC_FFMPEG_WAIT", "120"))
+MUSIC_FFMPEG_RETRY = float(os.getenv("MUSIC_FFMPEG_RETRY", "15"))  # pause before waiting again after a timeout
+
+# Gapless transitions: spawn and buffer the next track this many seconds before the current ends
+PREWARM_SECONDS = float(os.getenv("MUSIC_PREWARM_SECONDS", "5"))
+PREWARM_FRAMES = 50  # 20ms Opus frames buffered ahead (1 second)
+PREWARM_MAX_AGE = 60  # seconds a buffered stream may idle before it is considered stale
+
+# Playback health: no first frame within START_TIMEOUT fails the track, frame gaps over STALL_SECONDS are stalls
+PLAYBACK_START_TIMEOUT = 15
+PLAYBACK_STALL_SECONDS = 3
+HEALTH_SAMPLES = 200
+# Stage timings (seconds) reported as p50/p95 by L!musicstats and benchmarks/ttfa.py
+PIPELINE_STAGES = ("extract", "resolve", "probe", "spawn", "first_frame", "play_to_audio")
+
+# Stream recovery: a track that errors or ends more than RESUME_TOLERANCE seconds early is
+# re-resolved and restarted at the frame-counted position, at most RESUME_MAX_ATTEMPTS times
+RESUME_TOLERANCE = 5
+RESUME_MAX_ATTEMPTS = 3
+
+# Disconnect after this many seconds alone in the channel or with nothing playing (0 disables)
+MUSIC_IDLE_TIMEOUT = float(os.getenv("MUSIC_IDLE_TIMEOUT", "300"))
+
+# Queue persistence: operations logged before a guild's log is compacted into a snapshot
+QUEUE_LOG_COMPACT_EVERY = 50
+QUEUE_LOG_COMPACT_MINUTES = 5
+# Stream URLs expire, so only stable track fields are persisted
+PERSISTED_TRACK_KEYS = ("title", "webpage_url", "requested_channel_id", "start_at", "duration")
+
+QUEUE_PAGE_SIZE = 10
+
+# Play history: plays are buffered and written in batches
+HISTORY_FLUSH_SECONDS = 30
+HISTORY_BATCH_SIZE = 50
+FRAME_SECONDS = 0.02  # Discord Opus frames are 20ms
+
+# Extraction cache: resolved stream info is reused until shortly before the stream URL expires
+EXTRACTION_CACHE_TTL = 3600
+EXTRACTION_EXPIRY_MARGIN = 300
+# Each guild's most played tracks of the last WARM_DAYS are pre-resolved every WARM_MINUTES
+WARM_MINUTES = 30
+WARM_TRACKS = 10
+WARM_DAYS = 30
+
 
 class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.ytdl = yt_dlp.YoutubeDL(YTDL_OPTS)
+        self.db = Database()
         self.queues: Dict[int, List[Dict[str, Any]]] = {}
+        self.queue_seconds: Dict[int, float] = {}  # running total of queued durations, so L!queue never walks the queue
         self.current: Dict[int, Dict[str, Any]] = {}
+        self.started_at: Dict[int, float] = {}  # {guild_id: monotonic time the current track was at 0s}
+        self.voice_channels: Dict[int, int] = {}  # {guild_id: voice_channel_id}
+        self.bitrates: Dict[int, int] = {}  # {guild_id: transcode bitrate in kbps}
+        self.prewarmed: Dict[int, Dict[str, Any]] = {}  # {guild_id: prepared source for queue[0]}
+        self._prewarm_handles: Dict[int, asyncio.TimerHandle] = {}
+        self.stations: Dict[str, Dict[str, Any]] = {}  # {name: {"broadcast", "tracks", "current", "guild_id"}}
+        self.radio_listeners: Dict[int, Tuple[str, Any]] = {}  # {guild_id: (station name, subscriber)}
+        # {guild_id: {"state", "generation", "track", "source", "requested", "stalls", "text_channel"}}
+        self.players: Dict[int, Dict[str, Any]] = {}
+        self._generation = 0
+        self._idle_handles: Dict[int, asyncio.TimerHandle] = {}
+        self._play_locks: Dict[int, asyncio.Lock] = {}  # {guild_id: held while _play_next starts a track}
+        self._retry_handles: Dict[int, asyncio.TimerHandle] = {}  # {guild_id: retry after an FFmpeg budget timeout}
+        self._reclaiming: set = set()  # guilds torn down by _reclaim_voice, awaiting their disconnect event
+        self.reclaimed_sessions = 0
+        self.health: Dict[str, Any] = {
+            "ttfa": deque(maxlen=HEALTH_SAMPLES),  # seconds from _play_next to the first audio frame
+            "stalls": 0,
+            "start_failures": 0,
+            "stale_callbacks": 0,
+            "recoveries": 0,
+            "recovered": 0,
+            "recovery_times": deque(maxlen=HEALTH_SAMPLES),  # seconds from stream failure to resumed audio
+        }
+        self.stage_timings: Dict[str, deque] = {stage: deque(maxlen=HEALTH_SAMPLES) for stage in PIPELINE_STAGES}
+        self._log_ops: Dict[int, int] = {}  # {guild_id: operations since last compaction}
+        self._restored = False
+        self._shutting_down = False
+        self.ffmpeg_budget = FFmpegBudget(MUSIC_MAX_FFMPEG, MUSIC_MAX_TRANSCODES)
+        self.audio_cache: Optional[AudioCache] = None
+        if MUSIC_CACHE_DIR:
+            try:
+                self.audio_cache = AudioCache(MUSIC_CACHE_DIR, MUSIC_CACHE_MAX_MB * 1024 * 1024, MUSIC_CACHE_MIN_PLAYS)
+            except Exception:
+                logging.exception("Failed to initialise audio cache at %s", MUSIC_CACHE_DIR)
+        self.search_ytdl = yt_dlp.YoutubeDL(SEARCH_YTDL_OPTS)
+        self.search_index = PrefixIndex()
+        self.search_cache = TTLCache(AUTOCOMPLETE_CACHE_TTL)
+        self._search_tasks: Dict[str, asyncio.Task] = {}
+        self._search_latest: Dict[int, str] = {}  # {user_id: last autocomplete input}
+        self._search_semaphore = asyncio.Semaphore(AUTOCOMPLETE_MAX_SEARCHES)
+        self.remote_searches = 0
+        self.extraction_cache = TTLCache(EXTRACTION_CACHE_TTL, max_entries=2000)
+        self._pending_plays: List[Tuple[int, str, Optional[str], Optional[str], int, float]] = []
+        self.warmed_tracks = 0
+        self.spotify: Optional[SpotifyClient] = None
+        if SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET:
+            self.spotify = SpotifyClient(
+                SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET,
+                SPOTIFY_API_BASE, SPOTIFY_ACCOUNTS_BASE, SPOTIFY_MAX_TRACKS
+            )
+        if self.audio_cache:
+            for title, url in self.audio_cache.cached_tracks():
+                self.search_index.add(title, url)
+
+    async def cog_load(self):
+        self._compact_queue_logs.start()
+        self._playback_watchdog.start()
+        self._flush_play_history.start()
+        self._warm_extraction_cache.start()
 
     async def cog_unload(self):
+        # Snapshot every guild with its current position so a restart resumes where it stopped
+        self._shutting_down = True
+        self._compact_queue_logs.cancel()
+        self._playback_watchdog.cancel()
+        self._flush_play_history.cancel()
+        self._warm_extraction_cache.cancel()
+        for guild_id, player in list(self.players.items()):
+            if player["state"] != "ended":
+                self._record_play(guild_id, player)
+        self._write_play_history(self._pending_plays)
+        self._pending_plays = []
+        for guild_id in list(self._idle_handles):
+            self._cancel_idle(guild_id)
+        for guild_id in list(self._log_ops) + list(self.current):
+            self._compact_queue_log(guild_id)
+        for guild_id in list(self.prewarmed) + list(self._prewarm_handles):
+            self._discard_prewarmed(guild_id)
+        for guild_id in list(self._retry_handles):
+            self._cancel_retry(guild_id)
         for vc in self.bot.voice_clients:
             try:
                 await vc.disconnect()
             except Exception:
                 pass
+        if self.spotify:
+            await self.spotify.close()
 
     # ===== UTILITIES =====
 
+    @staticmethod
+    def _percentiles(samples) -> Optional[Tuple[float, float]]:
+        """(p50, p95) of a sample, or None when it is empty"""
+        ordered = sorted(samples)
+        if not ordered:
+            return None
+        return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def _record_stage(self, stage: str, seconds: float):
+        self.stage_timings[stage].append(seconds)
+
     async def _extract_info(self, search: str) -> Dict[str, Any]:
         loop = asyncio.get_event_loop()
         
         if "youtube.com/watch" in search or "youtu.be" in search:
             search = search.split("&list=")[0]
         
-        return await loop.run_in_executor(None, lambda: self.ytdl.extract_info(search, download=False))
+        started = time.monotonic()
+        try:
+            return await loop.run_in_executor(None, lambda: self.ytdl.extract_info(search, download=False))
+        finally:
+            self._record_stage("extract", time.monotonic() - started)
 
     async def _resolve_track(self, query: str) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        try:
+            return await self._resolve_query(query)
+        finally:
+            self._record_stage("resolve", time.monotonic() - started)
+
+    async def _resolve_query(self, query: str) -> List[Dict[str, Any]]:
+        spotify_link = parse_spotify_url(query)
+        if spotify_link:
+            return await self._resolve_spotify(*spotify_link)
+
+        video_url = self._single_video_url(query)
+        if video_url:
+            # Same key the warm-up loop and /play autocomplete use, so warmed tracks skip yt-dlp
+            track = await self._extract_stream(video_url)
+            if not track.get("url"):
+                return []
+            track["title"] = track["title"] or "Unknown"
+            return [track]
+
         info = await self._extract_info(query)
         
         if not info:
@@ -79,15 +294,274 @@ class Music(commands.Cog):
                         "title": entry.get("title", "Unknown"),
                         "webpage_url": webpage_url,
                         "url": entry.get("url"),
+                        "acodec": entry.get("acodec"),
+                        "duration": entry.get("duration"),
                     })
             return tracks if tracks else []
         
+        webpage_url = info.get("webpage_url") or info.get("original_url")
+        if webpage_url:
+            track = self._cache_stream(webpage_url, info)
+            track["title"] = track["title"] or "Unknown"
+            return [track]
         return [{
             "title": info.get("title", "Unknown"),
-            "webpage_url": info.get("webpage_url") or info.get("original_url"),
+            "webpage_url": webpage_url,
             "url": info.get("url"),
+            "acodec": info.get("acodec"),
+            "duration": info.get("duration"),
         }]
 
+    @staticmethod
+    def _single_video_url(query: str) -> Optional[str]:
+        """Canonical watch URL for a YouTube link to one video (a playlist id alongside is ignored)"""
+        parsed = urlparse(query.strip())
+        host = (parsed.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        video_id = None
+        if host == "youtu.be":
+            video_id = parsed.path.strip("/").split("/")[0]
+        elif host in ("youtube.com", "m.youtube.com", "music.youtube.com") and parsed.path == "/watch":
+            video_id = parse_qs(parsed.query).get("v", [None])[0]
+        if not video_id:
+            return None
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    async def _resolve_spotify(self, kind: str, spotify_id: str) -> List[Dict[str, Any]]:
+        """Map a Spotify link to YouTube videos, searching each song only the first time it is seen"""
+        if not self.spotify:
+            raise SpotifyError("Spotify links are not configured (SPOTIPY_CLIENT_ID / SPOTIPY_CLIENT_SECRET)")
+        items = await self.spotify.get_tracks(kind, spotify_id)
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        mappings = await loop.run_in_executor(
+            None, self.db.get_spotify_mappings, [item["spotify_id"] for item in items]
+        )
+
+        semaphore = asyncio.Semaphore(SPOTIFY_SEARCH_CONCURRENCY)
+
+        async def search(item: Dict[str, Any]) -> Optional[Tuple[str, str, Optional[str], Optional[float], int]]:
+            query = f"{item['artists']} - {item['title']}" if item["artists"] else item["title"]
+            async with semaphore:
+                try:
+                    info = await loop.run_in_executor(
+                        None, lambda: self.search_ytdl.extract_info(f"ytsearch1:{query} audio", download=False)
+                    )
+                except Exception:
+                    logging.exception("YouTube search failed for Spotify track %s", item["spotify_id"])
+                    return None
+            entries = [e for e in (info or {}).get("entries") or [] if e and e.get("id")]
+            if not entries:
+                return None
+            entry = entries[0]
+            return (item["spotify_id"], entry["id"], entry.get("title"), entry.get("duration"), int(time.time()))
+
+        missing = [item for item in items if item["spotify_id"] not in mappings]
+        if missing:
+            found = [m for m in await asyncio.gather(*(search(item) for item in missing)) if m]
+            await loop.run_in_executor(None, self.db.set_spotify_mappings, found)
+            for mapped_id, video_id, title, duration, _ in found:
+                mappings[mapped_id] = {"video_id": video_id, "title": title, "duration": duration}
+            logging.info("Mapped %s/%s Spotify tracks to YouTube", len(found), len(missing))
+
+        tracks = []
+        for item in items:
+            mapping = mappings.get(item["spotify_id"])
+            if not mapping:
+                continue
+            # A bare video id in "url" is resolved to a stream lazily, right before playback
+            tracks.append({
+                "title": f"{item['artists']} - {item['title']}" if item["artists"] else item["title"],
+                "webpage_url": f"https://www.youtube.com/watch?v={mapping['video_id']}",
+                "url": mapping["video_id"],
+                "duration": mapping["duration"] or item["duration"],
+            })
+        return tracks
+
+    async def _run_search(self, key: str, query: str) -> List[Tuple[str, str]]:
+        """ytsearch5 without resolving formats; failures are cached as empty results"""
+        results: List[Tuple[str, str]] = []
+        try:
+            async with self._search_semaphore:
+                loop = asyncio.get_running_loop()
+                info = await loop.run_in_executor(
+                    None, lambda: self.search_ytdl.extract_info(f"ytsearch5:{query}", download=False)
+                )
+            self.remote_searches += 1
+            for entry in (info or {}).get("entries") or []:
+                if not entry or not entry.get("title"):
+                    continue
+                url = entry.get("webpage_url") or entry.get("url")
+                if entry.get("id") and not str(url or "").startswith(("http://", "https://")):
+                    url = f"https://www.youtube.com/watch?v={entry['id']}"
+                if url:
+                    results.append((entry["title"], url))
+        except Exception:
+            logging.exception("Autocomplete search failed for %r", query)
+        finally:
+            self._search_tasks.pop(key, None)
+        self.search_cache.set(key, results)
+        return results
+
+    def _search_remote(self, query: str) -> "asyncio.Future":
+        """Cached or in-flight search for a prefix; concurrent keystrokes share one search"""
+        key = normalize_query(query)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(cached)
+            return future
+        task = self._search_tasks.get(key)
+        if task is None:
+            task = self._search_tasks[key] = asyncio.ensure_future(self._run_search(key, query))
+        return task
+
+    @staticmethod
+    def _is_opus_source(track: Dict[str, Any]) -> bool:
+        return str(track.get("acodec") or "").lower().startswith("opus")
+
+    async def _create_source(
+        self,
+        track: Dict[str, Any],
+        stream_url: Optional[str],
+        cached_path: Optional[str],
+        start_at: float = 0.0,
+        bitrate: int = DEFAULT_AUDIO_BITRATE
+    ) -> discord.AudioSource:
+        """Build the FFmpeg source, preferring codec copy over transcoding"""
+        seek = f" -ss {start_at:.1f}" if start_at > 0 else ""
+        started = time.monotonic()
+        stage = "spawn"
+        try:
+            if cached_path:
+                # Local Opus file: no network and no re-encode
+                return discord.FFmpegOpusAudio(cached_path, codec="copy", before_options=seek.strip() or None)
+            before_options = FFMPEG_OPTIONS["before_options"] + seek
+            if self._is_opus_source(track):
+                return discord.FFmpegOpusAudio(
+                    stream_url,
+                    codec="copy",
+                    before_options=before_options,
+                    options=FFMPEG_OPTIONS["options"],
+                )
+            options = self._transcode_options(bitrate)
+            if track.get("acodec"):
+                # Known non-Opus codec: transcode without probing
+                return discord.FFmpegOpusAudio(stream_url, before_options=before_options, options=options)
+            stage = "probe"  # ffprobe round trip plus the spawn
+            return await discord.FFmpegOpusAudio.from_probe(stream_url, before_options=before_options, options=options)
+        finally:
+            self._record_stage(stage, time.monotonic() - started)
+
+    async def _acquire_ffmpeg_slot(
+        self,
+        guild: discord.Guild,
+        track: Dict[str, Any],
+        cached_path: Optional[str],
+        start_at: float,
+        text_channel: Optional[discord.TextChannel]
+    ):
+        """Reserve an FFmpeg slot for a track, waiting (with an ETA) when the global budget is full"""
+        kind = COPY if cached_path or self._is_opus_source(track) else TRANSCODE
+        duration = track.get("duration")
+        remaining = max(0.0, duration - start_at) if duration else None
+        job = self.ffmpeg_budget.try_acquire(guild.id, kind, remaining)
+        if job:
+            track.pop("_budget_retry", None)
+            return job
+
+        # Retries after a timeout wait quietly; the channel was already told
+        retrying = track.get("_budget_retry")
+        eta = self.ffmpeg_budget.eta(kind)
+        if text_channel and not retrying:
+            wait_text = f"~{int(eta)}s" if eta is not None else f"até {int(MUSIC_FFMPEG_WAIT)}s"
+            embed = discord.Embed(
+                title="⏳ Servidor Ocupado",
+                description=f"Todos os processos de áudio estão em uso. **{track.get('title', 'Unknown')}** começa em {wait_text}.",
+                color=discord.Color.orange()
+            )
+            await text_channel.send(embed=embed)
+
+        job = await self.ffmpeg_budget.acquire(guild.id, kind, remaining, timeout=MUSIC_FFMPEG_WAIT)
+        if job:
+            track.pop("_budget_retry", None)
+            return job
+
+        # Still busy: keep the track at the front and try again shortly, so the queue never stalls
+        self._get_queue(guild.id).insert(0, track)
+        self._add_queue_seconds(guild.id, [track])
+        self._compact_queue_log(guild.id)
+        track["_budget_retry"] = True
+        self._schedule_retry(guild)
+        if text_channel and not retrying:
+            embed = discord.Embed(
+                title="⏳ Servidor Ocupado",
+                description="Ainda não há capacidade de áudio disponível. A música começa assim que um processo ficar livre.",
+                color=discord.Color.orange()
+            )
+            await text_channel.send(embed=embed)
+        return None
+
+    def _schedule_retry(self, guild: discord.Guild):
+        self._cancel_retry(guild.id)
+        self._retry_handles[guild.id] = self.bot.loop.call_later(
+            MUSIC_FFMPEG_RETRY, lambda: asyncio.ensure_future(self._play_next(guild))
+        )
+
+    def _cancel_retry(self, guild_id: int):
+        handle = self._retry_handles.pop(guild_id, None)
+        if handle:
+            handle.cancel()
+
+    @staticmethod
+    def _transcode_options(bitrate: int) -> str:
+        return f"{FFMPEG_OPTIONS['options']} -b:a {bitrate}k -bufsize {bitrate * BUFSIZE_FACTOR}k"
+
+    def _update_bitrate(self, guild: discord.Guild) -> int:
+        """Match the encoder bitrate to the bot's current voice channel"""
+        vc = guild.voice_client
+        channel_bitrate = getattr(vc.channel, "bitrate", None) if vc and vc.channel else None
+        if channel_bitrate:
+            bitrate = max(MIN_AUDIO_BITRATE, min(MAX_AUDIO_BITRATE, channel_bitrate // 1000))
+        else:
+            bitrate = DEFAULT_AUDIO_BITRATE
+        if self.bitrates.get(guild.id) != bitrate:
+            logging.info("Audio bitrate for guild %s set to %skbps", guild.id, bitrate)
+        self.bitrates[guild.id] = bitrate
+        return bitrate
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        guild = member.guild
+        if member.id == self.bot.user.id:
+            if after.channel and before.channel != after.channel:
+                self._reclaiming.discard(guild.id)
+                self._update_bitrate(guild)
+            elif before.channel and not after.channel and not self._shutting_down:
+                # Disconnected (kicked, channel deleted, L!stop): nothing left to keep alive.
+                # After an idle reclaim the teardown already ran; just consume the mark.
+                if guild.id in self._reclaiming:
+                    self._reclaiming.discard(guild.id)
+                else:
+                    self._free_guild(guild.id)
+                return
+        vc = guild.voice_client
+        if not vc or not vc.channel:
+            return
+        if member.id == self.bot.user.id or vc.channel in (before.channel, after.channel):
+            if self._is_idle(guild):
+                self._schedule_idle(guild)
+            else:
+                self._cancel_idle(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        vc = after.guild.voice_client
+        if vc and vc.channel and vc.channel.id == after.id and getattr(before, "bitrate", None) != getattr(after, "bitrate", None):
+            self._update_bitrate(after.guild)
+
     def _get_text_channel(self, guild: discord.Guild, channel_id: Optional[int]) -> Optional[discord.TextChannel]:
         if channel_id:
             channel = self.bot.get_channel(channel_id)
@@ -100,6 +574,278 @@ class Music(commands.Cog):
     def _get_queue(self, guild_id: int) -> List[Dict[str, Any]]:
         return self.queues.setdefault(guild_id, [])
 
+    @staticmethod
+    def _track_seconds(track: Dict[str, Any]) -> float:
+        """Seconds left to play of a queued track (0 for livestreams and unknown durations)"""
+        return max(0.0, (track.get("duration") or 0) - (track.get("start_at") or 0))
+
+    def _add_queue_seconds(self, guild_id: int, tracks: List[Dict[str, Any]], sign: int = 1):
+        total = self.queue_seconds.get(guild_id, 0.0) + sign * sum(self._track_seconds(t) for t in tracks)
+        self.queue_seconds[guild_id] = max(0.0, total)
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        minutes, secs = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+    def _render_queue_page(self, guild_id: int, page: int, page_size: int = QUEUE_PAGE_SIZE) -> discord.Embed:
+        """Embed for one page of the queue; only the visible slice is formatted"""
+        queue = self._get_queue(guild_id)
+        pages = max(1, -(-len(queue) // page_size))
+        page = min(max(page, 0), pages - 1)
+        guild = self.bot.get_guild(guild_id)
+        vc = guild.voice_client if guild else None
+
+        lines = []
+        remaining = self.queue_seconds.get(guild_id, 0.0)
+        current_track = self.current.get(guild_id)
+        if vc and (vc.is_playing() or vc.is_paused()) and current_track:
+            lines.append(f"🎵 **Now Playing:** {current_track.get('title', 'Unknown')}")
+            if vc.is_paused():
+                lines.append("*(paused)*")
+            if current_track.get("duration"):
+                remaining += max(0.0, current_track["duration"] - self._playback_position(guild_id))
+
+        if not queue and not lines:
+            return discord.Embed(title="🎵 Queue", description="Queue is empty.", color=discord.Color.blue())
+
+        offset = page * page_size
+        for i, item in enumerate(queue[offset:offset + page_size], start=offset + 1):
+            duration = f" `{self._format_duration(item['duration'])}`" if item.get("duration") else ""
+            lines.append(f"**{i}.** {item.get('title', 'Unknown')}{duration}")
+
+        embed = discord.Embed(
+            title=f"🎵 Queue ({len(queue)} tracks)",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        footer = f"Remaining: {self._format_duration(remaining)}"
+        if pages > 1:
+            footer = f"Page {page + 1}/{pages} • {footer}"
+        embed.set_footer(text=footer)
+        return embed
+
+    def _reset_guild(self, guild_id: int):
+        """Forget all playback state of a guild, including the persisted queue"""
+        self._get_queue(guild_id).clear()
+        self.queue_seconds.pop(guild_id, None)
+        self.current.pop(guild_id, None)
+        self.started_at.pop(guild_id, None)
+        self.voice_channels.pop(guild_id, None)
+        self.bitrates.pop(guild_id, None)
+        self._discard_prewarmed(guild_id)
+        self.radio_listeners.pop(guild_id, None)
+        player = self.players.pop(guild_id, None)
+        if player and player["state"] != "ended":
+            self._record_play(guild_id, player)
+        self._log_ops.pop(guild_id, None)
+        try:
+            self.db.clear_music_log(guild_id)
+        except Exception:
+            logging.exception("Failed to clear queue log for guild %s", guild_id)
+
+    def _free_guild(self, guild_id: int):
+        """Drop every per-guild object once the bot has left voice"""
+        self._cancel_idle(guild_id)
+        self._cancel_retry(guild_id)
+        self._reset_guild(guild_id)
+        self.queues.pop(guild_id, None)
+        lock = self._play_locks.get(guild_id)
+        if lock and not lock.locked():
+            self._play_locks.pop(guild_id, None)
+        self._kill_leftover_ffmpeg(guild_id)
+
+    # ===== IDLE VOICE RECLAMATION =====
+
+    def _is_idle(self, guild: discord.Guild) -> bool:
+        """Alone in the channel, or connected with nothing playing, paused or queued"""
+        vc = guild.voice_client
+        if not vc or not vc.channel:
+            return False
+        if not any(not member.bot for member in vc.channel.members):
+            return True
+        return not vc.is_playing() and not vc.is_paused() and not self.queues.get(guild.id)
+
+    def _schedule_idle(self, guild: discord.Guild):
+        if MUSIC_IDLE_TIMEOUT <= 0 or guild.id in self._idle_handles:
+            return
+        self._idle_handles[guild.id] = self.bot.loop.call_later(
+            MUSIC_IDLE_TIMEOUT, lambda: asyncio.ensure_future(self._reclaim_voice(guild))
+        )
+
+    def _cancel_idle(self, guild_id: int):
+        handle = self._idle_handles.pop(guild_id, None)
+        if handle:
+            handle.cancel()
+
+    def _kill_leftover_ffmpeg(self, guild_id: int) -> int:
+        """Kill FFmpeg processes still charged to a guild after its sources were cleaned up"""
+        killed = 0
+        for job in self.ffmpeg_budget.jobs_for(guild_id):
+            if not job.process:
+                continue  # background cache downloads finish on their own
+            # poll() reaps our own child, so an exited FFmpeg is never confused with a reused pid
+            if job.process.poll() is None:
+                try:
+                    job.process.kill()
+                    killed += 1
+                except OSError:
+                    pass
+            self.ffmpeg_budget.release(job)
+        if killed:
+            logging.warning("Killed %s leftover FFmpeg processes for guild %s", killed, guild_id)
+        return killed
+
+    async def _reclaim_voice(self, guild: discord.Guild):
+        self._idle_handles.pop(guild.id, None)
+        if not self._is_idle(guild):
+            return
+        vc = guild.voice_client
+        channel_name = vc.channel.name
+        # Tear down once, before the disconnect event arrives; the stop callback then finds no player
+        vc.stop()
+        self._free_guild(guild.id)
+        self._reclaiming.add(guild.id)
+        try:
+            await vc.disconnect()
+        except Exception:
+            self._reclaiming.discard(guild.id)
+            logging.exception("Failed to disconnect idle voice client in guild %s", guild.id)
+        self.reclaimed_sessions += 1
+        logging.info("Reclaimed idle voice session in guild %s (%s)", guild.id, channel_name)
+
+    # ===== QUEUE PERSISTENCE =====
+
+    @staticmethod
+    def _persistable(track: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not track:
+            return None
+        return {key: track[key] for key in PERSISTED_TRACK_KEYS if track.get(key) is not None}
+
+    def _playback_position(self, guild_id: int) -> float:
+        """Seconds into the current track, counted from frames sent so pauses and stalls don't drift"""
+        player = self.players.get(guild_id)
+        if player and player["source"].frames:
+            return player["start_at"] + player["source"].frames * FRAME_SECONDS
+        started = self.started_at.get(guild_id)
+        if started is None:
+            return 0.0
+        return max(0.0, time.monotonic() - started)
+
+    def _log_queue_op(self, guild_id: int, op: str, payload: Any = None):
+        """Append a queue operation to the guild's log, compacting it when it grows too long"""
+        try:
+            self.db.append_music_log(guild_id, op, json.dumps(payload) if payload is not None else None)
+        except Exception:
+            logging.exception("Failed to log queue operation %s for guild %s", op, guild_id)
+            return
+        self._log_ops[guild_id] = self._log_ops.get(guild_id, 0) + 1
+        if self._log_ops[guild_id] >= QUEUE_LOG_COMPACT_EVERY:
+            self._compact_queue_log(guild_id)
+
+    def _compact_queue_log(self, guild_id: int):
+        """Replace the guild's log with a single snapshot of its current state"""
+        queue = self.queues.get(guild_id, [])
+        current = self.current.get(guild_id)
+        try:
+            if not queue and not current:
+                self.db.clear_music_log(guild_id)
+            else:
+                snapshot = {
+                    "queue": [self._persistable(t) for t in queue],
+                    "current": self._persistable(current),
+                    "position": round(self._playback_position(guild_id), 1),
+                    "voice_channel_id": self.voice_channels.get(guild_id),
+                }
+                self.db.compact_music_log(guild_id, json.dumps(snapshot))
+            self._log_ops[guild_id] = 0
+        except Exception:
+            logging.exception("Failed to compact queue log for guild %s", guild_id)
+
+    @staticmethod
+    def _replay_queue_log(rows: List[Any]) -> Dict[str, Any]:
+        """Rebuild a guild's queue state from its (op, payload) log"""
+        state: Dict[str, Any] = {"queue": [], "current": None, "position": 0.0, "voice_channel_id": None}
+        for op, payload in rows:
+            data = json.loads(payload) if payload else None
+            if op == "snapshot":
+                state.update(data or {})
+                state["queue"] = list(state.get("queue") or [])
+            elif op == "push":
+                state["queue"].extend(data or [])
+            elif op == "pop":
+                if state["queue"]:
+                    state["queue"].pop(0)
+            elif op == "clear":
+                state["queue"] = []
+                state["current"] = None
+                state["position"] = 0.0
+            elif op == "current":
+                state["current"] = (data or {}).get("track")
+                state["position"] = (data or {}).get("position", 0.0)
+            elif op == "voice":
+                state["voice_channel_id"] = data
+        return state
+
+    async def _restore_guild(self, guild_id: int):
+        """Restore a guild's queue from its log and resume playback in the last voice channel"""
+        guild = self.bot.get_guild(guild_id)
+        try:
+            state = self._replay_queue_log(self.db.get_music_log(guild_id))
+        except Exception:
+            logging.exception("Failed to read queue log for guild %s", guild_id)
+            return
+        if not guild or (not state["queue"] and not state["current"]):
+            self.db.clear_music_log(guild_id)
+            return
+
+        queue = list(state["queue"])
+        if state["current"]:
+            resumed = dict(state["current"])
+            resumed["start_at"] = state.get("position") or 0.0
+            queue.insert(0, resumed)
+        self.queues[guild_id] = queue
+        self.queue_seconds[guild_id] = 0.0
+        self._add_queue_seconds(guild_id, queue)
+        if state.get("voice_channel_id"):
+            self.voice_channels[guild_id] = state["voice_channel_id"]
+        self._compact_queue_log(guild_id)
+        logging.info("Restored %s queued tracks for guild %s", len(queue), guild_id)
+
+        channel = guild.get_channel(state.get("voice_channel_id") or 0)
+        if not isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+            return
+        if not any(not member.bot for member in channel.members):
+            # Nobody to play for; keep the queue until someone uses L!play again
+            return
+        if guild.voice_client:
+            return
+        try:
+            await channel.connect()
+        except Exception:
+            logging.exception("Failed to reconnect to voice channel %s", channel.id)
+            return
+        await self._play_next(guild)
+
+    @tasks.loop(minutes=QUEUE_LOG_COMPACT_MINUTES)
+    async def _compact_queue_logs(self):
+        for guild_id in set(self._log_ops) | set(self.current):
+            self._compact_queue_log(guild_id)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if self._restored:
+            return
+        self._restored = True
+        try:
+            guild_ids = self.db.get_music_log_guilds()
+        except Exception:
+            logging.exception("Failed to list persisted music queues")
+            return
+        for guild_id in guild_ids:
+            asyncio.create_task(self._restore_guild(guild_id))
+
     async def _ensure_voice(self, ctx: commands.Context) -> Optional[discord.VoiceClient]:
         if not ctx.author.voice or not ctx.author.voice.channel:
             embed = discord.Embed(
@@ -147,8 +893,7 @@ class Music(commands.Cog):
         vc = ctx.voice_client
         if vc and vc.channel != channel:
             await vc.move_to(channel)
-            return vc
-        if not vc:
+        elif not vc:
             try:
                 vc = await channel.connect()
             except discord.errors.ClientException:
@@ -159,20 +904,64 @@ class Music(commands.Cog):
                 )
                 await ctx.send(embed=embed)
                 return None
+        if self.voice_channels.get(ctx.guild.id) != channel.id:
+            self.voice_channels[ctx.guild.id] = channel.id
+            self._log_queue_op(ctx.guild.id, "voice", channel.id)
         return vc
 
-    async def _play_next(self, guild: discord.Guild):
-        queue = self._get_queue(guild.id)
-        if not queue:
-            self.current.pop(guild.id, None)
-            return
-        track = queue.pop(0)
-        vc = guild.voice_client
-        if not vc:
-            return
+    async def _resolve_stream(self, track: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """Return (cached_path, stream_url) for a track, extracting the stream URL when needed"""
+        cached_path = self.audio_cache.lookup(track) if self.audio_cache else None
+        if cached_path:
+            return cached_path, None
 
-        text_channel = self._get_text_channel(guild, track.get("requested_channel_id"))
+        stream_url = track.get("url")
+        if stream_url and not str(stream_url).startswith(("http://", "https://")):
+            stream_url = None
 
+        if not stream_url and not track.get("webpage_url") and track.get("url"):
+            candidate = track.get("url")
+            if candidate and not str(candidate).startswith(("http://", "https://")):
+                track["webpage_url"] = f"https://www.youtube.com/watch?v={candidate}"
+
+        if not stream_url and track.get("webpage_url"):
+            info = await self._extract_stream(track["webpage_url"])
+            stream_url = info.get("url")
+            track["acodec"] = info.get("acodec")
+            track["duration"] = info.get("duration") or track.get("duration")
+            track["title"] = info.get("title", track.get("title", "Unknown"))
+            track["webpage_url"] = info.get("webpage_url", track.get("webpage_url"))
+        return None, stream_url
+
+    async def _extract_stream(self, webpage_url: str) -> Dict[str, Any]:
+        """Stream info for a page URL, served from the extraction cache while the stream URL is valid"""
+        cached = self.extraction_cache.get(webpage_url)
+        if cached is not None:
+            return dict(cached)
+        info = await self._extract_info(webpage_url) or {}
+        return self._cache_stream(webpage_url, info)
+
+    def _cache_stream(self, webpage_url: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Track fields of a fresh extraction, kept in the extraction cache while the stream URL is valid"""
+        stream = {key: info.get(key) for key in ("url", "acodec", "duration", "title", "webpage_url")}
+        stream["webpage_url"] = stream["webpage_url"] or info.get("original_url") or webpage_url
+        if stream["url"]:
+            # Google stream URLs carry their expiry time; never hand out one about to expire
+            expire = parse_qs(urlparse(stream["url"]).query).get("expire", [None])[0]
+            ttl = EXTRACTION_CACHE_TTL
+            if expire and expire.isdigit():
+                ttl = min(ttl, int(expire) - time.time() - EXTRACTION_EXPIRY_MARGIN)
+            if ttl > 0:
+                self.extraction_cache.set(webpage_url, dict(stream), ttl)
+        return stream
+
+    async def _prepare_track(
+        self,
+        guild: discord.Guild,
+        track: Dict[str, Any],
+        text_channel: Optional[discord.TextChannel]
+    ) -> Optional[Dict[str, Any]]:
+        """Resolve a track and spawn its FFmpeg source; returns None when it cannot play"""
         if not shutil.which("ffmpeg"):
             if text_channel:
                 embed = discord.Embed(
@@ -181,41 +970,28 @@ class Music(commands.Cog):
                     color=discord.Color.red()
                 )
                 await text_channel.send(embed=embed)
-            return
-        
-        if not track.get("url"):
-            logging.warning("Track without URL, skipping: %s", track.get("title"))
-            await self._play_next(guild)
-            return
-
-        stream_url = track.get("url")
-        if stream_url and not str(stream_url).startswith(("http://", "https://")):
-            stream_url = None
+            return None
 
-        if not stream_url and not track.get("webpage_url") and track.get("url"):
-            candidate = track.get("url")
-            if candidate and not str(candidate).startswith(("http://", "https://")):
-                track["webpage_url"] = f"https://www.youtube.com/watch?v={candidate}"
+        if not track.get("url") and not track.get("webpage_url"):
+            logging.warning("Track without URL, skipping: %s", track.get("title"))
+            self._skip_track(guild)
+            return None
 
-        if not stream_url and track.get("webpage_url"):
-            try:
-                info = await self._extract_info(track["webpage_url"])
-                stream_url = info.get("url")
-                track["title"] = info.get("title", track.get("title", "Unknown"))
-                track["webpage_url"] = info.get("webpage_url", track.get("webpage_url"))
-            except Exception as e:
-                logging.exception("Failed to resolve stream URL", exc_info=e)
-                if text_channel:
-                    embed = discord.Embed(
-                        title="❌ Erro",
-                        description="Não foi possível obter o stream da música.",
-                        color=discord.Color.red()
-                    )
-                    await text_channel.send(embed=embed)
-                await self._play_next(guild)
-                return
+        try:
+            cached_path, stream_url = await self._resolve_stream(track)
+        except Exception as e:
+            logging.exception("Failed to resolve stream URL", exc_info=e)
+            if text_channel:
+                embed = discord.Embed(
+                    title="❌ Erro",
+                    description="Não foi possível obter o stream da música.",
+                    color=discord.Color.red()
+                )
+                await text_channel.send(embed=embed)
+            self._skip_track(guild)
+            return None
 
-        if not stream_url:
+        if not cached_path and not stream_url:
             logging.warning("Stream URL not resolved for: %s", track.get("title"))
             if text_channel:
                 embed = discord.Embed(
@@ -224,18 +1000,31 @@ class Music(commands.Cog):
                     color=discord.Color.red()
                 )
                 await text_channel.send(embed=embed)
-            await self._play_next(guild)
-            return
-        
-        self.current[guild.id] = track
+            self._skip_track(guild)
+            return None
+
+        start_at = float(track.get("start_at", 0) or 0)
+        job = await self._acquire_ffmpeg_slot(guild, track, cached_path, start_at, text_channel)
+        if not job:
+            return None
+        if not guild.voice_client or self._shutting_down:
+            self.ffmpeg_budget.release(job)
+            return None
+
+        bitrate = self._update_bitrate(guild)
+        ffmpeg_options = {
+            "before_options": FFMPEG_OPTIONS["before_options"] + (f" -ss {start_at:.1f}" if start_at > 0 else ""),
+            "options": self._transcode_options(bitrate),
+        }
         try:
-            source = await discord.FFmpegOpusAudio.from_probe(stream_url, **FFMPEG_OPTIONS)
+            source = await self._create_source(track, stream_url, cached_path, start_at, bitrate)
         except Exception as e:
-            logging.exception("FFmpeg probe error", exc_info=e)
+            logging.exception("FFmpeg source error", exc_info=e)
             try:
-                source = discord.FFmpegPCMAudio(stream_url, **FFMPEG_OPTIONS)
+                source = discord.FFmpegPCMAudio(cached_path or stream_url, **ffmpeg_options)
             except Exception as inner:
                 logging.exception("FFmpeg error", exc_info=inner)
+                self.ffmpeg_budget.release(job)
                 if text_channel:
                     embed = discord.Embed(
                         title="❌ Erro",
@@ -243,59 +1032,459 @@ class Music(commands.Cog):
                         color=discord.Color.red()
                     )
                     await text_channel.send(embed=embed)
-                await self._play_next(guild)
+                self._skip_track(guild)
+                return None
+
+        return {
+            "track": track,
+            "source": BudgetedSource(source, self.ffmpeg_budget, job, self.bot.loop),
+            "cached_path": cached_path,
+            "stream_url": stream_url,
+            "start_at": start_at,
+            "created": time.monotonic(),
+        }
+
+    # ===== PRE-WARMING =====
+
+    def _schedule_prewarm(self, guild: discord.Guild, track: Dict[str, Any], start_at: float):
+        """Spawn the next track's FFmpeg shortly before the current one ends"""
+        self._cancel_prewarm(guild.id)
+        duration = track.get("duration")
+        if not PREWARM_SECONDS or not duration:
+            return
+        delay = max(0.0, duration - start_at - PREWARM_SECONDS)
+        self._prewarm_handles[guild.id] = self.bot.loop.call_later(
+            delay, lambda: asyncio.ensure_future(self._prewarm_next(guild))
+        )
+
+    def _cancel_prewarm(self, guild_id: int):
+        handle = self._prewarm_handles.pop(guild_id, None)
+        if handle:
+            handle.cancel()
+
+    def _discard_prewarmed(self, guild_id: int):
+        self._cancel_prewarm(guild_id)
+        prepared = self.prewarmed.pop(guild_id, None)
+        if prepared:
+            prepared["source"].cleanup()
+
+    def _take_prewarmed(self, guild_id: int, track: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the pre-warmed source for this track, discarding stale or mismatched ones"""
+        prepared = self.prewarmed.pop(guild_id, None)
+        if not prepared:
+            return None
+        if prepared["track"] is not track or time.monotonic() - prepared["created"] > PREWARM_MAX_AGE:
+            prepared["source"].cleanup()
+            return None
+        return prepared
+
+    async def _prewarm_next(self, guild: discord.Guild):
+        self._prewarm_handles.pop(guild.id, None)
+        queue = self._get_queue(guild.id)
+        vc = guild.voice_client
+        if not queue or guild.id in self.prewarmed or not vc or vc.is_paused() or self._shutting_down:
+            return
+        track = queue[0]
+        try:
+            cached_path, stream_url = await self._resolve_stream(track)
+        except Exception:
+            logging.exception("Pre-warm resolution failed for %s", track.get("title"))
+            return
+        if not cached_path and not stream_url:
+            return
+        start_at = float(track.get("start_at", 0) or 0)
+        kind = COPY if cached_path or self._is_opus_source(track) else TRANSCODE
+        job = self.ffmpeg_budget.try_acquire(guild.id, kind, track.get("duration"))
+        if not job:
+            return
+        try:
+            source = await self._create_source(track, stream_url, cached_path, start_at, self._update_bitrate(guild))
+        except Exception:
+            logging.exception("Pre-warm spawn failed for %s", track.get("title"))
+            self.ffmpeg_budget.release(job)
+            return
+        source = PrewarmedSource(BudgetedSource(source, self.ffmpeg_budget, job, self.bot.loop))
+        await self.bot.loop.run_in_executor(None, source.warm, PREWARM_FRAMES)
+        queue = self._get_queue(guild.id)
+        if not queue or queue[0] is not track or guild.id in self.prewarmed:
+            source.cleanup()
+            return
+        self.prewarmed[guild.id] = {
+            "track": track,
+            "source": source,
+            "cached_path": cached_path,
+            "stream_url": stream_url,
+            "start_at": start_at,
+            "created": time.monotonic(),
+        }
+        logging.info("Pre-warmed next track: %s (%s frames)", track.get("title"), source.buffered)
+
+    # ===== PLAYBACK =====
+
+    async def _play_next(self, guild: discord.Guild, resume: Optional[Dict[str, Any]] = None):
+        """Start the next queued track, or restart `resume["track"]` after a stream failure
+
+        Calls for one guild run one at a time: preparing a track can wait on yt-dlp or an
+        FFmpeg slot, and a second caller must not start another track meanwhile.
+        """
+        self._cancel_retry(guild.id)
+        lock = self._play_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            vc = guild.voice_client
+            if not resume and vc and (vc.is_playing() or vc.is_paused()):
+                return  # the call that held the lock started a track; its end advances the queue
+            await self._start_next(guild, resume)
+
+    def _skip_track(self, guild: discord.Guild):
+        """Move on from a track that cannot play, once the current _play_next has released the lock"""
+        asyncio.create_task(self._play_next(guild))
+
+    async def _start_next(self, guild: discord.Guild, resume: Optional[Dict[str, Any]]):
+        if self._shutting_down or guild.id in self.radio_listeners:
+            return
+        queue = self._get_queue(guild.id)
+        if not queue and not resume:
+            self._discard_prewarmed(guild.id)
+            if self.current.pop(guild.id, None):
+                self.started_at.pop(guild.id, None)
+                self._log_queue_op(guild.id, "current", {"track": None})
+            if guild.voice_client:
+                self._schedule_idle(guild)
+            return
+        requested = time.monotonic()
+        if resume:
+            track = resume["track"]
+        else:
+            track = queue.pop(0)
+            self._add_queue_seconds(guild.id, [track], -1)
+            self._log_queue_op(guild.id, "pop")
+        vc = guild.voice_client
+        if not vc:
+            self._discard_prewarmed(guild.id)
+            return
+
+        text_channel = self._get_text_channel(guild, track.get("requested_channel_id"))
+
+        # Fast path: the next source was spawned and buffered while the previous track played
+        # (a resumed track leaves the pre-warmed source of queue[0] alone)
+        prepared = None if resume else self._take_prewarmed(guild.id, track)
+        if not prepared:
+            prepared = await self._prepare_track(guild, track, text_channel)
+            if not prepared:
                 return
+            vc = guild.voice_client
+        cached_path = prepared["cached_path"]
+        stream_url = prepared["stream_url"]
+        start_at = prepared["start_at"]
+        self.current[guild.id] = track
+        track.pop("start_at", None)
+
+        self._generation += 1
+        generation = self._generation
+        source = MonitoredSource(
+            prepared["source"],
+            on_first_frame=lambda: self.bot.loop.call_soon_threadsafe(self._on_first_audio, guild.id, generation),
+        )
+        player = {
+            "state": "starting",
+            "generation": generation,
+            "track": track,
+            "source": source,
+            "requested": requested,
+            "spawned": time.monotonic(),
+            "stalls": self.players.get(guild.id, {}).get("stalls", 0),
+            "text_channel": text_channel,
+            "start_at": start_at,
+            "resumes": resume["attempt"] if resume else 0,
+            "failed_at": resume["failed_at"] if resume else None,
+        }
 
         def after_play(err):
-            if err:
-                logging.exception("Playback error", exc_info=err)
-                if text_channel:
-                    asyncio.run_coroutine_threadsafe(
-                        text_channel.send(
-                            embed=discord.Embed(
-                                title="❌ Erro",
-                                description="Falha ao tocar a música. A tentar a próxima...",
-                                color=discord.Color.red()
-                            )
-                        ),
-                        self.bot.loop
-                    )
-            asyncio.run_coroutine_threadsafe(self._play_next(guild), self.bot.loop)
+            # Runs on the audio player thread; the generation makes late or repeated callbacks harmless
+            self.bot.loop.call_soon_threadsafe(self._on_track_end, guild, generation, err)
+
+        try:
+            vc.play(source, after=after_play)
+        except discord.ClientException:
+            # The entry in self.players still belongs to whatever is playing; leave it alone
+            logging.exception("Could not start playback")
+            source.cleanup()
+            return
+        # Callbacks are queued onto this loop, so the entry exists before either can run
+        self.players[guild.id] = player
+        self.started_at[guild.id] = time.monotonic() - start_at
+        self._schedule_prewarm(guild, track, start_at)
+        if not self._is_idle(guild):
+            self._cancel_idle(guild.id)
+        self._log_queue_op(guild.id, "current", {"track": self._persistable(track), "position": start_at})
+        self.search_index.add(track.get("title"), track.get("webpage_url"))
+        if self.audio_cache and self.audio_cache.record_play(track) and stream_url:
+            # Caching is best effort: only when a slot is free right now
+            copy = self._is_opus_source(track)
+            cache_job = self.ffmpeg_budget.try_acquire(guild.id, COPY if copy else TRANSCODE, track.get("duration"))
+            if cache_job:
+                task = asyncio.create_task(self.audio_cache.store(
+                    track, stream_url, FFMPEG_OPTIONS["before_options"], copy=copy
+                ))
+                task.add_done_callback(lambda _: self.ffmpeg_budget.release(cache_job))
+        logging.info("Now playing: %s%s", track.get("title"), " (cached)" if cached_path else "")
 
-        vc.play(source, after=after_play)
-        logging.info("Now playing: %s", track.get("title"))
-        asyncio.create_task(self._verify_playback(guild, track, text_channel))
+    # ===== PLAYBACK HEALTH =====
+
+    def _on_first_audio(self, guild_id: int, generation: int):
+        player = self.players.get(guild_id)
+        if not player or player["generation"] != generation:
+            return
+        player["state"] = "playing"
+        ttfa = player["source"].first_frame_at - player["requested"]
+        self.health["ttfa"].append(ttfa)
+        self._record_stage("first_frame", player["source"].first_frame_at - player["spawned"])
+        requested_at = player["track"].pop("_requested_at", None)
+        if requested_at is not None:
+            self._record_stage("play_to_audio", player["source"].first_frame_at - requested_at)
+        logging.info("First audio for guild %s after %.2fs", guild_id, ttfa)
+        if player["failed_at"] is not None:
+            recovery = player["source"].first_frame_at - player["failed_at"]
+            self.health["recovered"] += 1
+            self.health["recovery_times"].append(recovery)
+            logging.info("Resumed %s at %.1fs after %.2fs", player["track"].get("title"), player["start_at"], recovery)
 
-    async def _verify_playback(
+    def _on_track_end(self, guild: discord.Guild, generation: int, err: Optional[Exception]):
+        """Advance the queue exactly once per track"""
+        player = self.players.get(guild.id)
+        if not player or player["generation"] != generation or player["state"] == "ended":
+            self.health["stale_callbacks"] += 1
+            return
+        player["state"] = "ended"
+        if self._should_resume(guild.id, player, err):
+            asyncio.create_task(self._resume_playback(guild, player, err))
+            return
+        self._record_play(guild.id, player)
+        text_channel = player.get("text_channel")
+        if err:
+            logging.exception("Playback error", exc_info=err)
+            if text_channel:
+                embed = discord.Embed(
+                    title="❌ Erro",
+                    description="Falha ao tocar a música. A tentar a próxima...",
+                    color=discord.Color.red()
+                )
+                asyncio.create_task(text_channel.send(embed=embed))
+        asyncio.create_task(self._play_next(guild))
+
+    def _should_resume(self, guild_id: int, player: Dict[str, Any], err: Optional[Exception]) -> bool:
+        """A stream error, or a stream that ran out well before the track's duration"""
+        track = player["track"]
+        source = player["source"]
+        duration = track.get("duration")
+        if not duration or not track.get("webpage_url") or player["resumes"] >= RESUME_MAX_ATTEMPTS:
+            return False
+        if player["resumes"] and not source.frames:
+            return False  # the previous restart produced nothing; don't loop
+        if err is None and not source.eof:
+            return False  # stopped on purpose (skip, stop, start timeout)
+        return self._playback_position(guild_id) < duration - RESUME_TOLERANCE
+
+    async def _resume_playback(self, guild: discord.Guild, player: Dict[str, Any], err: Optional[Exception]):
+        track = player["track"]
+        position = self._playback_position(guild.id)
+        self.health["recoveries"] += 1
+        logging.warning(
+            "Stream for %s failed at %.1fs (%s), resuming", track.get("title"), position, err or "ended early"
+        )
+        # The cached stream URL is the one that just failed: resolve a fresh one
+        self.extraction_cache.pop(track["webpage_url"])
+        track["url"] = None
+        track["start_at"] = position
+        await self._play_next(guild, resume={
+            "track": track,
+            "attempt": player["resumes"] + 1,
+            "failed_at": time.monotonic(),
+        })
+
+    async def _send_playback_diagnostic(
         self,
         guild: discord.Guild,
         track: Dict[str, Any],
         text_channel: Optional[discord.TextChannel]
     ):
-        await asyncio.sleep(2)
         vc = guild.voice_client
-        if not vc:
+        if not text_channel or not vc:
             return
-        if not vc.is_playing() and not vc.is_paused():
-            logging.warning("Playback did not start for: %s", track.get("title"))
-            if text_channel:
-                embed = discord.Embed(
-                    title="❌ Erro",
-                    description="Não foi possível iniciar o áudio. Diagnóstico abaixo:",
-                    color=discord.Color.red()
-                )
-                me = guild.me or guild.get_member(self.bot.user.id)
-                perms = vc.channel.permissions_for(me) if me and vc.channel else None
-                embed.add_field(name="Canal", value=vc.channel.name if vc.channel else "(desconhecido)", inline=False)
-                embed.add_field(name="Conectado", value=str(bool(vc.is_connected())), inline=True)
-                embed.add_field(name="Opus", value=str(bool(discord.opus.is_loaded())), inline=True)
-                embed.add_field(name="FFmpeg", value=str(bool(shutil.which("ffmpeg"))), inline=True)
-                if perms:
-                    embed.add_field(name="Permissões", value=f"connect={perms.connect}, speak={perms.speak}", inline=False)
-                if track.get("webpage_url"):
-                    embed.add_field(name="URL", value=track.get("webpage_url"), inline=False)
-                await text_channel.send(embed=embed)
-            await self._play_next(guild)
+        embed = discord.Embed(
+            title="❌ Erro",
+            description="Não foi possível iniciar o áudio. Diagnóstico abaixo:",
+            color=discord.Color.red()
+        )
+        me = guild.me or guild.get_member(self.bot.user.id)
+        perms = vc.channel.permissions_for(me) if me and vc.channel else None
+        embed.add_field(name="Canal", value=vc.channel.name if vc.channel else "(desconhecido)", inline=False)
+        embed.add_field(name="Conectado", value=str(bool(vc.is_connected())), inline=True)
+        embed.add_field(name="Opus", value=str(bool(discord.opus.is_loaded())), inline=True)
+        embed.add_field(name="FFmpeg", value=str(bool(shutil.which("ffmpeg"))), inline=True)
+        if perms:
+            embed.add_field(name="Permissões", value=f"connect={perms.connect}, speak={perms.speak}", inline=False)
+        if track.get("webpage_url"):
+            embed.add_field(name="URL", value=track.get("webpage_url"), inline=False)
+        await text_channel.send(embed=embed)
+
+    # ===== PLAY HISTORY =====
+
+    def _record_play(self, guild_id: int, player: Dict[str, Any]):
+        """Buffer a play for the history table; only tracks that produced audio count"""
+        track = player["track"]
+        frames = player["source"].frames
+        key = track_key(track)
+        if not frames or not key:
+            return
+        self._pending_plays.append(
+            (guild_id, key, track.get("title"), track.get("webpage_url"), int(time.time()), round(frames * FRAME_SECONDS, 1))
+        )
+        if len(self._pending_plays) >= HISTORY_BATCH_SIZE:
+            plays, self._pending_plays = self._pending_plays, []
+            asyncio.get_event_loop().run_in_executor(None, self._write_play_history, plays)
+
+    def _write_play_history(self, plays: List[Tuple[int, str, Optional[str], Optional[str], int, float]]):
+        """Write a batch of plays in one transaction (safe to run in an executor)"""
+        if not plays:
+            return
+        try:
+            self.db.add_music_plays(plays)
+        except Exception:
+            logging.exception("Failed to write %s plays to the history", len(plays))
+
+    @tasks.loop(seconds=HISTORY_FLUSH_SECONDS)
+    async def _flush_play_history(self):
+        plays, self._pending_plays = self._pending_plays, []
+        await asyncio.get_running_loop().run_in_executor(None, self._write_play_history, plays)
+
+    @tasks.loop(minutes=WARM_MINUTES)
+    async def _warm_extraction_cache(self):
+        """Pre-resolve every guild's most played tracks so the first plays skip yt-dlp"""
+        since = int(time.time()) - WARM_DAYS * 86400
+        loop = asyncio.get_running_loop()
+        guild_ids = await loop.run_in_executor(None, self.db.get_music_history_guilds, since)
+        for guild_id in guild_ids:
+            if not self.bot.get_guild(guild_id):
+                continue
+            top = await loop.run_in_executor(None, self.db.get_top_tracks, guild_id, WARM_TRACKS, since)
+            for entry in top:
+                url = entry["webpage_url"]
+                if not url:
+                    continue
+                self.search_index.add(entry["title"], url)
+                if url in self.extraction_cache or (self.audio_cache and self.audio_cache.contains(entry)):
+                    continue
+                try:
+                    await self._extract_stream(url)
+                    self.warmed_tracks += 1
+                except Exception:
+                    logging.exception("Failed to warm extraction cache for %s", url)
+
+    @_warm_extraction_cache.before_loop
+    async def _before_warm_extraction_cache(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(seconds=1)
+    async def _playback_watchdog(self):
+        """Check frame timestamps: fail tracks that never produce audio and count stalls"""
+        now = time.monotonic()
+        for guild_id, player in list(self.players.items()):
+            guild = self.bot.get_guild(guild_id)
+            vc = guild.voice_client if guild else None
+            if not vc or vc.is_paused():
+                continue
+            source = player["source"]
+            if player["state"] == "starting" and now - player["spawned"] > PLAYBACK_START_TIMEOUT:
+                logging.warning("Playback did not start for: %s", player["track"].get("title"))
+                player["state"] = "failed"
+                self.health["start_failures"] += 1
+                await self._send_playback_diagnostic(guild, player["track"], player.get("text_channel"))
+                # Stopping runs the after callback, which advances the queue once
+                vc.stop()
+            elif player["state"] == "playing" and source.last_frame_at and now - source.last_frame_at > PLAYBACK_STALL_SECONDS:
+                player["state"] = "stalled"
+                player["stalls"] += 1
+                self.health["stalls"] += 1
+                logging.warning("Playback stalled in guild %s: %s", guild_id, player["track"].get("title"))
+            elif player["state"] == "stalled" and source.last_frame_at and now - source.last_frame_at <= PLAYBACK_STALL_SECONDS:
+                player["state"] = "playing"
+
+    @_playback_watchdog.before_loop
+    async def _before_playback_watchdog(self):
+        await self.bot.wait_until_ready()
+
+    # ===== RADIO (FAN-OUT) =====
+
+    async def _station_source(self, station: Dict[str, Any]) -> Optional[discord.AudioSource]:
+        """Spawn the FFmpeg source for a station's next track (one process per station, not per guild)"""
+        guild = self.bot.get_guild(station["guild_id"])
+        while station["tracks"]:
+            track = station["tracks"].pop(0)
+            try:
+                cached_path, stream_url = await self._resolve_stream(track)
+            except Exception:
+                logging.exception("Radio resolution failed for %s", track.get("title"))
+                continue
+            if not cached_path and not stream_url:
+                continue
+            kind = COPY if cached_path or self._is_opus_source(track) else TRANSCODE
+            # Charged to guild 0 so reclaiming one listener's session never kills the shared station
+            job = self.ffmpeg_budget.try_acquire(0, kind, track.get("duration"))
+            if not job:
+                logging.warning("Radio %s stopped: FFmpeg budget exhausted", station["name"])
+                return None
+            bitrate = self._update_bitrate(guild) if guild else DEFAULT_AUDIO_BITRATE
+            try:
+                source = await self._create_source(track, stream_url, cached_path, 0.0, bitrate)
+            except Exception:
+                logging.exception("Radio spawn failed for %s", track.get("title"))
+                self.ffmpeg_budget.release(job)
+                continue
+            station["current"] = track
+            return BudgetedSource(source, self.ffmpeg_budget, job, self.bot.loop)
+        station["current"] = None
+        return None
+
+    def _station_next_source(self, station: Dict[str, Any]) -> Optional[discord.AudioSource]:
+        """Called from an audio player thread when the station's current track ends"""
+        future = asyncio.run_coroutine_threadsafe(self._station_source(station), self.bot.loop)
+        try:
+            return future.result(timeout=30)
+        except Exception:
+            logging.exception("Radio %s could not advance", station["name"])
+            return None
+
+    def _close_station(self, name: str):
+        station = self.stations.get(name)
+        if not station or station["broadcast"].subscribers:
+            return
+        self.stations.pop(name, None)
+        station["broadcast"].cleanup()
+        logging.info("Radio %s closed", name)
+
+    def _radio_subscribe(self, guild: discord.Guild, vc: discord.VoiceClient, name: str):
+        station = self.stations[name]
+        if vc.is_playing() or vc.is_paused():
+            vc.stop()
+        subscriber = station["broadcast"].subscribe()
+        self.radio_listeners[guild.id] = (name, subscriber)
+
+        def after_radio(err):
+            if err:
+                logging.exception("Radio playback error", exc_info=err)
+            self.bot.loop.call_soon_threadsafe(self._radio_left, guild.id, subscriber)
+
+        vc.play(subscriber, after=after_radio)
+
+    def _radio_left(self, guild_id: int, subscriber: Any):
+        listener = self.radio_listeners.get(guild_id)
+        if listener and listener[1] is subscriber:
+            self.radio_listeners.pop(guild_id, None)
+            guild = self.bot.get_guild(guild_id)
+            if guild and guild.voice_client:
+                # The station went off the air: hand the voice client back to the guild's queue
+                asyncio.ensure_future(self._play_next(guild))
 
     # ===== COMMANDS =====
 
@@ -311,9 +1500,13 @@ class Music(commands.Cog):
             )
             await ctx.send(embed=embed)
 
-    @commands.command(name="play", aliases=["p"])
+    @commands.hybrid_command(name="play", aliases=["p"], description="Play a song from YouTube")
+    @discord.app_commands.describe(query="Search text or YouTube link")
     async def play(self, ctx, *, query: str):
         """Play song from YouTube"""
+        invoked = time.monotonic()
+        if ctx.interaction:
+            await ctx.defer()
         # Check if user is in AFK channel
         if ctx.author.voice and ctx.guild.afk_channel and ctx.author.voice.channel == ctx.guild.afk_channel:
             embed = discord.Embed(
@@ -359,7 +1552,12 @@ class Music(commands.Cog):
         queue = self._get_queue(ctx.guild.id)
         for t in tracks:
             t["requested_channel_id"] = ctx.channel.id
+        if not queue and not (vc.is_playing() or vc.is_paused()):
+            # Starts right away: measure the whole command up to the first audio frame
+            tracks[0]["_requested_at"] = invoked
         queue.extend(tracks)
+        self._add_queue_seconds(ctx.guild.id, tracks)
+        self._log_queue_op(ctx.guild.id, "push", [self._persistable(t) for t in tracks])
         
         if len(tracks) == 1:
             result_embed = discord.Embed(
@@ -383,6 +1581,32 @@ class Music(commands.Cog):
 
 
 
+    @play.autocomplete("query")
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str) -> List[discord.app_commands.Choice[str]]:
+        """Recently played and cached tracks first, then a debounced YouTube search"""
+        suggestions = self.search_index.search(current, 25)
+        typed = normalize_query(current)
+        if len(suggestions) < 5 and len(typed) >= AUTOCOMPLETE_MIN_CHARS and not typed.startswith("http"):
+            # Only the last keystroke after a pause reaches YouTube
+            self._search_latest[interaction.user.id] = typed
+            await asyncio.sleep(AUTOCOMPLETE_DEBOUNCE)
+            if self._search_latest.get(interaction.user.id) == typed:
+                self._search_latest.pop(interaction.user.id, None)
+                try:
+                    # Shielded: a slow search keeps running and fills the cache for the next keystroke
+                    suggestions += await asyncio.wait_for(asyncio.shield(self._search_remote(current)), AUTOCOMPLETE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    pass
+
+        choices = []
+        seen = set()
+        for title, url in suggestions:
+            if url in seen or len(url) > 100:
+                continue
+            seen.add(url)
+            choices.append(discord.app_commands.Choice(name=title[:100], value=url))
+        return choices[:25]
+
     @commands.command(name="skip", aliases=["sk"])
     async def skip(self, ctx):
         """Skip current song"""
@@ -433,9 +1657,7 @@ class Music(commands.Cog):
         """Stop music and leave channel"""
         vc = ctx.voice_client
         if vc:
-            queue = self._get_queue(ctx.guild.id)
-            queue.clear()
-            self.current.pop(ctx.guild.id, None)
+            self._reset_guild(ctx.guild.id)
             vc.stop()
             await vc.disconnect()
             embed = discord.Embed(
@@ -494,57 +1716,296 @@ class Music(commands.Cog):
     async def queue(self, ctx):
         """Show current queue"""
         queue = self._get_queue(ctx.guild.id)
-        vc = ctx.voice_client
+        if len(queue) <= QUEUE_PAGE_SIZE:
+            await ctx.send(embed=self._render_queue_page(ctx.guild.id, 0))
+            return
+        view = QueueView(self, ctx.guild.id, QUEUE_PAGE_SIZE)
+        view.message = await ctx.send(embed=view.render(), view=view)
 
-        lines = []
-        current_track = self.current.get(ctx.guild.id)
-        if vc and (vc.is_playing() or vc.is_paused()) and current_track:
-            lines.append(f"🎵 **Now Playing:** {current_track.get('title', 'Unknown')}")
-            if vc.is_paused():
-                lines.append("*(paused)*")
+    @commands.command(name="radio_start", aliases=["radio"])
+    async def radio_start(self, ctx, nome: str, *, query: str):
+        """Start a shared radio station that other servers can tune into"""
+        nome = nome.lower()
+        if nome in self.stations:
+            embed = discord.Embed(
+                title="❌ Rádio Existente",
+                description=f"Já existe uma rádio chamada **{nome}**. Usa `L!radio_join {nome}`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
 
-        if not queue:
-            if not lines:
-                embed = discord.Embed(
-                    title="🎵 Queue",
-                    description="Queue is empty.",
-                    color=discord.Color.blue()
-                )
-                await ctx.send(embed=embed)
-                return
+        vc = await self._ensure_voice(ctx)
+        if not vc:
+            return
+        if (vc.is_playing() or vc.is_paused()) and ctx.guild.id not in self.radio_listeners:
+            embed = discord.Embed(
+                title="❌ Ocupado",
+                description="Já estou a tocar a fila deste servidor. Usa `L!stop` primeiro.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        try:
+            tracks = [t for t in await self._resolve_track(query) if t.get("url")]
+        except Exception as e:
+            logging.exception("Radio search failed", exc_info=e)
+            tracks = []
+        if not tracks:
+            embed = discord.Embed(
+                title="❌ No Results",
+                description="No videos available (may be private or deleted).",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        station = {"name": nome, "tracks": tracks, "current": None, "guild_id": ctx.guild.id}
+        first = await self._station_source(station)
+        if not first:
+            embed = discord.Embed(
+                title="❌ Erro",
+                description="Não foi possível iniciar a rádio.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        station["broadcast"] = BroadcastSource(
+            first,
+            next_source=lambda: self._station_next_source(station),
+            on_empty=lambda: self.bot.loop.call_soon_threadsafe(self._close_station, nome),
+        )
+        self.stations[nome] = station
+        self._radio_subscribe(ctx.guild, vc, nome)
+
+        embed = discord.Embed(
+            title="📻 Rádio Iniciada",
+            description=f"**{nome}** está no ar com **{len(tracks)}** música(s).\nOutros servidores podem ouvir com `L!radio_join {nome}`.",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="radio_join")
+    async def radio_join(self, ctx, nome: str):
+        """Tune into a shared radio station"""
+        nome = nome.lower()
+        if nome not in self.stations:
+            embed = discord.Embed(
+                title="❌ Rádio Não Encontrada",
+                description="Usa `L!radio_list` para ver as rádios no ar.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        vc = await self._ensure_voice(ctx)
+        if not vc:
+            return
+        if (vc.is_playing() or vc.is_paused()) and ctx.guild.id not in self.radio_listeners:
+            embed = discord.Embed(
+                title="❌ Ocupado",
+                description="Já estou a tocar a fila deste servidor. Usa `L!stop` primeiro.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        self._radio_subscribe(ctx.guild, vc, nome)
+        current = self.stations[nome].get("current") or {}
+        embed = discord.Embed(
+            title="📻 A Ouvir Rádio",
+            description=f"**{nome}** — {current.get('title', 'Unknown')}",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="radio_leave")
+    async def radio_leave(self, ctx):
+        """Stop listening to the radio"""
+        vc = ctx.voice_client
+        if ctx.guild.id not in self.radio_listeners or not vc:
             embed = discord.Embed(
-                title="🎵 Queue",
-                description="\n".join(lines),
+                title="📻 Rádio",
+                description="Não estás a ouvir nenhuma rádio.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+        self.radio_listeners.pop(ctx.guild.id, None)
+        vc.stop()
+        embed = discord.Embed(
+            title="📻 Rádio",
+            description="Saíste da rádio.",
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+        # _play_next was held off while listening: resume the guild's own queue, or start the idle timer
+        await self._play_next(ctx.guild)
+
+    @commands.command(name="radio_list", aliases=["radios"])
+    async def radio_list(self, ctx):
+        """List radio stations on the air"""
+        if not self.stations:
+            embed = discord.Embed(
+                title="📻 Rádios",
+                description="Nenhuma rádio no ar. Cria uma com `L!radio_start <nome> <pesquisa|link>`.",
                 color=discord.Color.blue()
             )
             await ctx.send(embed=embed)
             return
+        embed = discord.Embed(title="📻 Rádios no Ar", color=discord.Color.blue())
+        for name, station in self.stations.items():
+            current = station.get("current") or {}
+            embed.add_field(
+                name=name,
+                value=f"🎵 {current.get('title', 'Unknown')}\n👥 {len(station['broadcast'].subscribers)} servidor(es) | {len(station['tracks'])} na fila",
+                inline=False
+            )
+        await ctx.send(embed=embed)
 
-        queued_lines = [f"**{i+1}.** {item.get('title', 'Unknown')}" for i, item in enumerate(queue)]
-        lines.extend(queued_lines)
+    @commands.command(name="musicstats")
+    @commands.has_permissions(administrator=True)
+    async def musicstats(self, ctx):
+        """Show music pipeline statistics (admin only)"""
+        embed = discord.Embed(
+            title="📈 Music Stats",
+            color=discord.Color.blue()
+        )
+        if self.audio_cache:
+            stats = self.audio_cache.stats()
+            embed.add_field(
+                name="💾 Audio Cache",
+                value=(
+                    f"Files: **{stats['files']}** ({stats['bytes'] / 1048576:.1f}/{stats['max_bytes'] / 1048576:.0f} MB)\n"
+                    f"Hits: **{stats['hits']}** | Misses: **{stats['misses']}** ({stats['hit_rate']:.0f}% hit rate)\n"
+                    f"Evictions: {stats['evictions']} | Failures: {stats['failures']} | Pending: {stats['pending']}"
+                ),
+                inline=False
+            )
+        else:
+            embed.add_field(name="💾 Audio Cache", value="Disabled (set `MUSIC_CACHE_DIR`)", inline=False)
 
-        chunks = []
-        chunk = []
-        total_chars = 0
-        
-        for line in lines:
-            if total_chars + len(line) + 1 > 4000:
-                chunks.append("\n".join(chunk))
-                chunk = []
-                total_chars = 0
-            chunk.append(line)
-            total_chars += len(line) + 1
-        
-        if chunk:
-            chunks.append("\n".join(chunk))
+        ttfa = self._percentiles(self.health["ttfa"])
+        if ttfa:
+            ttfa_text = f"p50 **{ttfa[0]:.2f}s** | p95 **{ttfa[1]:.2f}s** ({len(self.health['ttfa'])} tracks)"
+        else:
+            ttfa_text = "Sem dados"
+        playing = sum(1 for p in self.players.values() if p["state"] == "playing")
+        stalled = sum(1 for p in self.players.values() if p["state"] == "stalled")
+        embed.add_field(
+            name="🩺 Playback Health",
+            value=(
+                f"Time to first audio: {ttfa_text}\n"
+                f"Playing: **{playing}** | Stalled now: **{stalled}**\n"
+                f"Stalls: {self.health['stalls']} | Start failures: {self.health['start_failures']} | "
+                f"Late callbacks ignored: {self.health['stale_callbacks']}"
+            ),
+            inline=False
+        )
+        stage_lines = []
+        for stage in PIPELINE_STAGES:
+            result = self._percentiles(self.stage_timings[stage])
+            if result:
+                stage_lines.append(f"`{stage}` p50 {result[0]:.2f}s | p95 {result[1]:.2f}s")
+        embed.add_field(name="⏱️ Pipeline Stages", value="\n".join(stage_lines) or "Sem dados", inline=False)
+
+        recoveries = self.health["recoveries"]
+        if recoveries:
+            rate = self.health["recovered"] / recoveries * 100
+            recovery_text = f"**{self.health['recovered']}/{recoveries}** resumed ({rate:.0f}%)"
+            if self.health["recovery_times"]:
+                recovery_text += f" | median time {statistics.median(self.health['recovery_times']):.2f}s"
+        else:
+            recovery_text = "Sem falhas de stream"
+        embed.add_field(name="🔁 Stream Recovery", value=recovery_text, inline=False)
+
+        embed.add_field(
+            name="🔌 Voice Sessions",
+            value=(
+                f"Connected: **{len(self.bot.voice_clients)}** | Idle timers: **{len(self._idle_handles)}**\n"
+                f"Reclaimed: **{self.reclaimed_sessions}** (timeout {MUSIC_IDLE_TIMEOUT:.0f}s)"
+            ),
+            inline=False
+        )
+
+        embed.add_field(
+            name="🔎 Autocomplete",
+            value=(
+                f"Indexed tracks: **{len(self.search_index)}** | Cached searches: **{len(self.search_cache)}**\n"
+                f"Search cache hits: {self.search_cache.hits} | Remote searches: {self.remote_searches}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="🔥 Extraction Cache",
+            value=(
+                f"Entries: **{len(self.extraction_cache)}** | Hits: **{self.extraction_cache.hits}** | "
+                f"Misses: **{self.extraction_cache.misses}**\n"
+                f"Warmed from history: {self.warmed_tracks} | Plays pending write: {len(self._pending_plays)}"
+            ),
+            inline=False
+        )
+
+        usage = self.ffmpeg_budget.usage()
+        embed.add_field(
+            name="⚙️ FFmpeg",
+            value=(
+                f"Processes: **{usage['processes']}/{usage['max_processes']}** "
+                f"(transcodes {usage['transcodes']}/{usage['max_transcodes']})\n"
+                f"CPU: **{usage['cpu']:.0f}%** | RSS: **{usage['rss_mb']:.0f} MB**\n"
+                f"Waiting: {usage['waiting']} | Queued: {usage['queued']} | Rejected: {usage['rejected']}"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
 
-        for i, chunk_text in enumerate(chunks):
+    @musicstats.error
+    async def musicstats_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
             embed = discord.Embed(
-                title=f"🎵 Queue (Part {i+1}/{len(chunks)})",
-                description=chunk_text,
+                title="❌ Permissão Negada",
+                description="Precisas de permissões de administrador para usar este comando.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+    @commands.command(name="toptracks", aliases=["musictop"])
+    @commands.has_permissions(administrator=True)
+    async def toptracks(self, ctx, dias: int = WARM_DAYS):
+        """Show this server's most played tracks (admin only)"""
+        dias = max(1, min(dias, 365))
+        since = int(time.time()) - dias * 86400
+        top = await asyncio.get_running_loop().run_in_executor(None, self.db.get_top_tracks, ctx.guild.id, 10, since)
+        if not top:
+            embed = discord.Embed(
+                title="📊 Top Tracks",
+                description=f"No plays recorded in the last {dias} days.",
                 color=discord.Color.blue()
             )
             await ctx.send(embed=embed)
+            return
+        lines = [
+            f"**{i}.** {entry['title'] or entry['track_id']} — {entry['plays']} plays "
+            f"({self._format_duration(entry['seconds'])} listened)"
+            for i, entry in enumerate(top, start=1)
+        ]
+        embed = discord.Embed(
+            title=f"📊 Top Tracks ({dias} days)",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+
+    @toptracks.error
+    async def toptracks_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            embed = discord.Embed(
+                title="❌ Permissão Negada",
+                description="Precisas de permissões de administrador para usar este comando.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
 
     @commands.command(name="music")
     async def music(self, ctx):
@@ -562,6 +2023,9 @@ class Music(commands.Cog):
             ("**resume** / r", "Retomar reprodução"),
             ("**stop** / s", "Parar e desconectar"),
             ("**queue** / q", "Mostrar fila"),
+            ("**radio_start** <nome> <pesquisa>", "Criar uma rádio partilhada"),
+            ("**radio_join** <nome> / radio_leave", "Ouvir / sair de uma rádio"),
+            ("**radio_list**", "Rádios no ar"),
             ("**testtone** / tone", "Tocar um tom de teste de 2s"),
         ]
         
@@ -1,19 +1,23 @@
 import asyncio
-import json
 import logging
 import os
 import random
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 import discord
-from discord.ext import commands
-from discord.ui import Modal, TextInput, View, Button, button
+from discord.ext import commands, tasks
+from discord.ui import Modal, TextInput, View, Button, DynamicItem
 from database import Database
+from utils.termo_dictionary import TermoDictionary, normalize_word
+from utils.termo_solver import TermoSolver, encode_result
 
 # Game configuration
 MAX_ATTEMPTS = 6
-WORD_SIZE = 5
+WORD_SIZES = (4, 5, 6, 7)
+DEFAULT_WORD_SIZE = 5
 
 # XP rewards based on number of attempts
 XP_REWARDS = {
@@ -25,10 +29,31 @@ XP_REWARDS = {
     6: 50,
 }
 
-# File with game words
-WORDS_FILE = "data/termo_palavras.json"
+# Answer words per word length
+WORDS_FILE = "data/termo_palavras_{}.json"
+# Valid guesses per word length (answers are always accepted too)
+DICTIONARY_FILE = "data/termo_dicionario_{}.txt"
+# Precomputed feedback matrices for hints, keyed by a hash of the word lists
+SOLVER_CACHE_DIR = "data/cache"
 # File with player data
 GAME_DATA_FILE = "data/game_data.json"
+# Daily puzzle: the day rolls over at midnight in this timezone
+DAILY_TZ = ZoneInfo(os.getenv("TERMO_DAILY_TZ", "Europe/Lisbon"))
+DAILY_EPOCH = date(2024, 1, 1)
+# Games untouched for this many seconds are expired by the sweeper
+SESSION_TTL = int(os.getenv("TERMO_SESSION_TTL", "86400"))
+SESSION_SWEEP_MINUTES = 10
+# Channel races: at most one board edit per interval, races idle this long are expired
+RACE_EDIT_INTERVAL = 2.0
+RACE_TTL = 1800
+
+
+def _size_word_input(text_input: TextInput, size: int):
+    """Point a modal's word field at the game's word length"""
+    text_input.label = f"Palavra com {size} letras"
+    text_input.placeholder = f"Escreve uma palavra com {size} letras..."
+    text_input.min_length = size
+    text_input.max_length = size
 
 
 class TermoModal(Modal, title="Faz a Tua Tentativa"):
@@ -40,11 +65,13 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
         required=True
     )
     
-    def __init__(self, cog, user_id, guild_id):
-        super().__init__()
+    def __init__(self, cog, user_id, guild_id, size: int = DEFAULT_WORD_SIZE):
+        # Dismissed modals are never submitted; the timeout drops them from the view store
+        super().__init__(timeout=600)
         self.cog = cog
         self.user_id = user_id
         self.guild_id = guild_id
+        _size_word_input(self.word, size)
     
     async def on_submit(self, interaction: discord.Interaction):
         """Process the termo when modal is submitted"""
@@ -63,7 +90,17 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
                     description="Usa apenas letras!",
                     color=discord.Color.red()
                 )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
+
+            # Reject non-words so letters can't be probed with "AAAAA" (doesn't cost an attempt)
+            if not self.cog.dictionary.is_valid(attempt):
+                embed = discord.Embed(
+                    title="❌ Palavra Inválida",
+                    description=f"**{attempt}** não está no dicionário. Tenta outra palavra.",
+                    color=discord.Color.red()
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
             # Check if user has active game
@@ -73,7 +110,7 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
                     description="A tua sessão de jogo expirou. Começa um novo jogo com `L!termo`",
                     color=discord.Color.red()
                 )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+                await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
             game = self.cog.active_games[self.user_id]
@@ -88,7 +125,7 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
             })
             
             num_attempts = len(game["attempts"])
-            word_termoed = attempt == secret_word
+            word_termoed = normalize_word(attempt) == normalize_word(secret_word)
             
             embed = self.cog._create_game_embed(
                 game["attempts"],
@@ -101,29 +138,38 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
             view = None
             if not word_termoed and num_attempts < MAX_ATTEMPTS:
                 # Provide the termo button again with the response
-                view = TermoGameView(self.cog, self.user_id, self.guild_id)
+                view = self.cog._game_view(self.user_id)
+                self.cog._save_session(self.user_id, game)
+
+            daily = game.get("daily")
+            # The daily word is shared by the whole server: the public board only shows the squares
+            public_embed = self.cog._create_game_embed(
+                game["attempts"], num_attempts, word_termoed, secret_word, interaction.user, hide_letters=True
+            ) if daily else embed
 
-            game_message = game.get("message")
+            game_message = self.cog._game_message(game)
             if game_message:
-                await game_message.edit(embed=embed, view=view)
+                await game_message.edit(embed=public_embed, view=view)
             else:
                 # Fallback: send a new message if original is missing
-                await interaction.followup.send(embed=embed, view=view)
+                await interaction.followup.send(embed=public_embed, view=view)
+            if daily:
+                await interaction.followup.send(embed=embed, ephemeral=True)
             
+            if daily and (word_termoed or num_attempts >= MAX_ATTEMPTS):
+                self.cog._record_daily_result(self.guild_id, self.user_id, daily, word_termoed, num_attempts)
+
             # Check game end
             if word_termoed:
                 # Victory!
                 await asyncio.sleep(0.5)  # Small delay to ensure response was processed
                 await self.cog._give_xp_reward(interaction, num_attempts)
+                asyncio.create_task(self.cog._send_game_analysis(interaction, game))
                 
                 # Update statistics
-                data = self.cog._get_player_data(self.guild_id, self.user_id)
-                data["games"] += 1
-                data["wins"] += 1
-                data["total_attempts"] += num_attempts
-                self.cog._save_player_data(self.guild_id, self.user_id, data)
+                self.cog._record_game(self.guild_id, self.user_id, True, num_attempts)
                 
-                del self.cog.active_games[self.user_id]
+                self.cog._end_session(self.user_id)
                 
             elif num_attempts >= MAX_ATTEMPTS:
                 # Defeat
@@ -132,14 +178,16 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
                     description=f"Mais sorte na próxima! A palavra era: **{secret_word}**",
                     color=discord.Color.red()
                 )
-                await interaction.channel.send(embed=defeat_embed)
+                if daily:
+                    await interaction.followup.send(embed=defeat_embed, ephemeral=True)
+                else:
+                    await interaction.channel.send(embed=defeat_embed)
+                asyncio.create_task(self.cog._send_game_analysis(interaction, game))
                 
                 # Update statistics
-                data = self.cog._get_player_data(self.guild_id, self.user_id)
-                data["games"] += 1
-                self.cog._save_player_data(self.guild_id, self.user_id, data)
+                self.cog._record_game(self.guild_id, self.user_id, False, num_attempts)
                 
-                del self.cog.active_games[self.user_id]
+                self.cog._end_session(self.user_id)
         except Exception as e:
             logging.exception(f"Error in modal submit: {e}")
             try:
@@ -153,18 +201,25 @@ class TermoModal(Modal, title="Faz a Tua Tentativa"):
                 logging.exception(f"Could not send error message: {send_error}")
 
 
-class TermoGameView(View):
-    """View with button to open the termo modal"""
-    
-    def __init__(self, cog: 'Termo', user_id: int, guild_id: int):
-        # Keep the view alive while the bot is up; avoids interaction failures after timeout
-        super().__init__(timeout=None)
-        self.cog = cog
+class TermoPlayButton(DynamicItem[Button], template=r"termo:play:(?P<user_id>[0-9]+)"):
+    """Guess button routed by its custom_id, so it survives restarts without a view per game"""
+
+    def __init__(self, user_id: int):
+        super().__init__(
+            Button(
+                label="Fazer Tentativa",
+                style=discord.ButtonStyle.primary,
+                emoji="🎯",
+                custom_id=f"termo:play:{user_id}",
+            )
+        )
         self.user_id = user_id
-        self.guild_id = guild_id
-    
-    @button(label="Fazer Tentativa", style=discord.ButtonStyle.primary, emoji="🎯")
-    async def termo_button(self, interaction: discord.Interaction, button: Button):
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(int(match["user_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
         try:
             logging.info(f"=== TERMO BUTTON CLICKED ===")
             logging.info(f"Button clicker ID: {interaction.user.id}, game player ID: {self.user_id}")
@@ -179,12 +234,22 @@ class TermoGameView(View):
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
+
+            cog = interaction.client.get_cog("Termo")
+            game = cog.active_games.get(self.user_id) if cog else None
+            if not game:
+                embed = discord.Embed(
+                    title="❌ Sem Jogo Ativo",
+                    description="Este jogo já terminou. Começa um novo jogo com `L!termo`",
+                    color=discord.Color.red()
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
             
             try:
-                logging.info(f"Creating modal for user={interaction.user.id} in guild={interaction.guild.id}")
+                logging.info(f"Creating modal for user={interaction.user.id} in guild={game['guild_id']}")
                 # Show the modal
-                modal = TermoModal(self.cog, self.user_id, self.guild_id)
-                logging.info(f"Modal instance created: {modal}")
+                modal = TermoModal(cog, self.user_id, game["guild_id"], game["size"])
                 await interaction.response.send_modal(modal)
                 logging.info("Modal shown successfully")
             except Exception as e:
@@ -202,28 +267,104 @@ class TermoGameView(View):
             logging.exception(f"Error in termo_button: {e}")
 
 
+class TermoRaceModal(Modal, title="Corrida Termo"):
+    word = TextInput(
+        label="Palavra com 5 letras",
+        placeholder="Escreve uma palavra com 5 letras...",
+        min_length=5,
+        max_length=5,
+        required=True
+    )
+
+    def __init__(self, cog: "Termo", channel_id: int, size: int = DEFAULT_WORD_SIZE):
+        super().__init__(timeout=600)
+        self.cog = cog
+        self.channel_id = channel_id
+        _size_word_input(self.word, size)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            await self.cog._race_guess(interaction, self.channel_id, self.word.value.strip().upper())
+        except Exception as e:
+            logging.exception(f"Error in race modal submit: {e}")
+            try:
+                embed = discord.Embed(
+                    title="❌ Erro",
+                    description=f"Erro ao processar tentativa: {str(e)[:100]}",
+                    color=discord.Color.red()
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            except Exception:
+                logging.exception("Could not send error message")
+
+
+class TermoRaceButton(DynamicItem[Button], template=r"termo:race:(?P<channel_id>[0-9]+)"):
+    """Guess button of a channel race; anyone in the channel can use it"""
+
+    def __init__(self, channel_id: int):
+        super().__init__(
+            Button(
+                label="Adivinhar",
+                style=discord.ButtonStyle.success,
+                emoji="🏁",
+                custom_id=f"termo:race:{channel_id}",
+            )
+        )
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(int(match["channel_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Termo")
+        race = cog.races.get(self.channel_id) if cog else None
+        if not race:
+            embed = discord.Embed(
+                title="❌ Sem Corrida",
+                description="Esta corrida já terminou. Começa outra com `L!termo_corrida`",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        if len(race["players"].get(interaction.user.id, [])) >= MAX_ATTEMPTS:
+            embed = discord.Embed(
+                title="❌ Sem Tentativas",
+                description="Já usaste todas as tuas tentativas nesta corrida.",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        await interaction.response.send_modal(TermoRaceModal(cog, self.channel_id, race["size"]))
+
+
 class Termo(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = Database()
-        self.words: list = []
-        self.active_games: Dict[int, Dict] = {}  # {user_id: {"word": str, "attempts": [], "channel": channel}}
-        self._load_words()
+        self.active_games: Dict[int, Dict] = {}  # {user_id: {"word": str, "size": int, "attempts": [], "channel_id": int, ...}}
+        # Each word length is loaded the first time that mode is played, not at startup
+        self.dictionary = TermoDictionary(DICTIONARY_FILE, WORDS_FILE)
+        self._solvers: Dict[int, TermoSolver] = {}
+        self._solver_lock = asyncio.Lock()
+        # Daily puzzle caches, both replaced on the first use after rollover
+        self._daily_words: Dict[int, Tuple[str, str]] = {}  # {guild_id: (day, word)}
+        self._daily_boards: Dict[int, Tuple[str, List[Dict]]] = {}  # {guild_id: (day, results)}
+        # No-repeat word bags: {(guild_id, size): {"seed": int, "position": int, "order": [word indices]}}
+        self._bags: Dict[Tuple[int, int], Dict] = {}
+        # Channel races: {channel_id: race state}, see _race_guess
+        self.races: Dict[int, Dict] = {}
         self._migrate_legacy_data()
+        self._restore_sessions()
 
-    def _load_words(self):
-        """Load word list from file"""
-        if os.path.exists(WORDS_FILE):
-            try:
-                with open(WORDS_FILE, "r", encoding="utf-8") as f:
-                    self.words = json.load(f)
-                logging.info(f"Loaded {len(self.words)} words for Termo.")
-            except Exception:
-                logging.exception("Failed to load Termo words.")
-                self.words = []
-        else:
-            logging.warning(f"Words file not found at {WORDS_FILE}")
-            self.words = []
+    async def cog_load(self):
+        self.bot.add_dynamic_items(TermoPlayButton, TermoRaceButton)
+        self._expire_sessions.start()
+
+    async def cog_unload(self):
+        self._expire_sessions.cancel()
+        self.bot.remove_dynamic_items(TermoPlayButton, TermoRaceButton)
 
     def _migrate_legacy_data(self):
         """Migra dados antigos em JSON para SQLite, se existirem"""
@@ -238,21 +379,298 @@ class Termo(commands.Cog):
         """Get player data from database"""
         return self.db.get_termo_stats(guild_id, user_id)
 
-    def _save_player_data(self, guild_id: int, user_id: int, data: Dict):
-        """Persist player data to database"""
-        self.db.set_termo_stats(
-            guild_id,
+    def _record_game(self, guild_id: int, user_id: int, won: bool, num_attempts: int):
+        """Persist a finished game (totals, streaks and distribution in one upsert)"""
+        self.db.record_termo_game(guild_id, user_id, won, num_attempts)
+
+    def _pick_word(self, guild_id: int, size: int = DEFAULT_WORD_SIZE) -> str:
+        """Draw the next word from the guild's shuffled bag (no repeats until every word was used)
+
+        Only the seed and position are stored; the order is rebuilt from the seed when
+        first needed and reshuffled when the bag runs out or the word list changes.
+        """
+        answers = self.dictionary.answers(size)
+        if not answers:
+            return "TERMO"  # fallback
+        bag = self._bags.get((guild_id, size))
+        if bag is None:
+            saved = self.db.get_termo_bag(guild_id, size)
+            if saved and saved["words_hash"] == answers.digest:
+                bag = {"seed": saved["seed"], "position": saved["position"]}
+            else:
+                bag = {"seed": random.getrandbits(62), "position": 0}
+            bag["order"] = self._bag_order(bag["seed"], len(answers))
+            self._bags[(guild_id, size)] = bag
+        if bag["position"] >= len(bag["order"]):
+            bag["seed"] = random.getrandbits(62)
+            bag["position"] = 0
+            bag["order"] = self._bag_order(bag["seed"], len(answers))
+        word = answers.words[bag["order"][bag["position"]]]
+        bag["position"] += 1
+        self.db.set_termo_bag(guild_id, size, bag["seed"], bag["position"], answers.digest)
+        return word
+
+    @staticmethod
+    def _bag_order(seed: int, count: int) -> List[int]:
+        order = list(range(count))
+        random.Random(seed).shuffle(order)
+        return order
+
+    def _restore_sessions(self):
+        """Reload games that were in progress when the bot stopped"""
+        try:
+            sessions = self.db.get_termo_sessions()
+        except Exception:
+            logging.exception("Failed to restore Termo sessions.")
+            return
+        for session in sessions:
+            self.active_games[session["user_id"]] = {
+                "word": session["word"],
+                "size": len(normalize_word(session["word"])),
+                "attempts": [
+                    {"word": word, "result": self._check_attempt(session["word"], word)}
+                    for word in session["attempts"]
+                ],
+                "channel_id": session["channel_id"],
+                "guild_id": session["guild_id"],
+                "message": None,
+                "message_id": session["message_id"],
+                "daily": session["daily"],
+                "updated_at": session["updated_at"],
+            }
+        if sessions:
+            logging.info(f"Restored {len(sessions)} Termo games.")
+
+    def _save_session(self, user_id: int, game: Dict):
+        game["updated_at"] = int(time.time())
+        self.db.save_termo_session(
             user_id,
-            data.get("games", 0),
-            data.get("wins", 0),
-            data.get("total_attempts", 0),
+            game["guild_id"],
+            game["channel_id"],
+            game["message_id"],
+            game["word"],
+            [att["word"] for att in game["attempts"]],
+            game.get("daily"),
+            game["updated_at"],
+        )
+
+    def _end_session(self, user_id: int) -> Optional[Dict]:
+        game = self.active_games.pop(user_id, None)
+        self.db.delete_termo_session(user_id)
+        return game
+
+    @staticmethod
+    def _game_view(user_id: int) -> View:
+        """Button view for a game; stopped up front so the view store keeps nothing per message"""
+        view = View(timeout=None)
+        view.add_item(TermoPlayButton(user_id))
+        view.stop()
+        return view
+
+    def _game_message(self, game: Dict):
+        """The game's message, or a partial one rebuilt from its ids after a restart"""
+        if game.get("message"):
+            return game["message"]
+        if game.get("message_id"):
+            return self.bot.get_partial_messageable(game["channel_id"]).get_partial_message(game["message_id"])
+        return None
+
+    @tasks.loop(minutes=SESSION_SWEEP_MINUTES)
+    async def _expire_sessions(self):
+        """Drop games nobody has touched for SESSION_TTL seconds"""
+        cutoff = time.time() - SESSION_TTL
+        for user_id, game in list(self.active_games.items()):
+            if game["updated_at"] >= cutoff:
+                continue
+            self._end_session(user_id)
+            if game.get("daily"):
+                self._record_daily_result(game["guild_id"], user_id, game["daily"], False, len(game["attempts"]))
+            message = self._game_message(game)
+            if not message:
+                continue
+            description = "O jogo ficou parado demasiado tempo."
+            if not game.get("daily"):
+                description += f" A palavra era: **{game['word']}**"
+            embed = discord.Embed(
+                title="⌛ Jogo Expirado",
+                description=description,
+                color=discord.Color.orange()
+            )
+            try:
+                await message.edit(embed=embed, view=None)
+            except discord.HTTPException:
+                logging.info(f"Could not edit expired Termo game of user {user_id}")
+
+        race_cutoff = time.monotonic() - RACE_TTL
+        for race in [r for r in self.races.values() if r["last_guess"] < race_cutoff]:
+            self._finish_race(race)
+
+    @staticmethod
+    def _race_view(channel_id: int) -> View:
+        view = View(timeout=None)
+        view.add_item(TermoRaceButton(channel_id))
+        view.stop()
+        return view
+
+    def _race_embed(self, race: Dict) -> discord.Embed:
+        """Shared board: every player's last feedback row, letters hidden so nobody copies"""
+        guild = self.bot.get_guild(race["guild_id"])
+        if race["winner"]:
+            title = "🏁 Corrida Terminada!"
+            color = discord.Color.green()
+        elif race["finished"]:
+            title = f"🏁 Corrida Terminada! A palavra era: **{race['word']}**"
+            color = discord.Color.red()
+        else:
+            title = "🏁 Corrida Termo"
+            color = discord.Color.blue()
+
+        def progress(item):
+            user_id, attempts = item
+            return (-attempts[-1]["result"].count("🟩"), len(attempts))
+
+        lines = []
+        for user_id, attempts in sorted(race["players"].items(), key=progress)[:30]:
+            member = guild.get_member(user_id) if guild else None
+            name = member.display_name if member else f"Utilizador {user_id}"
+            crown = "👑 " if user_id == race["winner"] else ""
+            lines.append(f"{crown}**{name}** {''.join(attempts[-1]['result'])} ({len(attempts)}/{MAX_ATTEMPTS})")
+        if len(race["players"]) > 30:
+            lines.append(f"... e mais {len(race['players']) - 30} jogadores")
+
+        embed = discord.Embed(
+            title=title,
+            description="\n".join(lines) or "Ninguém tentou ainda. Carrega no botão para jogar!",
+            color=color
         )
+        if race["winner"]:
+            embed.add_field(name="Palavra", value=f"**{race['word']}**", inline=False)
+        else:
+            embed.set_footer(text=f"Todos adivinham a mesma palavra de {race['size']} letras; o primeiro a acertar ganha.")
+        return embed
+
+    def _request_race_render(self, race: Dict):
+        """Mark the board stale; a single task per race applies the latest state at most once per interval"""
+        race["dirty"] = True
+        if race["render_task"] is None or race["render_task"].done():
+            race["render_task"] = asyncio.create_task(self._render_race(race))
+
+    async def _render_race(self, race: Dict):
+        while race["dirty"]:
+            wait = race["last_edit"] + RACE_EDIT_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            race["dirty"] = False
+            race["last_edit"] = time.monotonic()
+            view = None if race["finished"] else self._race_view(race["channel_id"])
+            try:
+                await race["message"].edit(embed=self._race_embed(race), view=view)
+            except discord.HTTPException:
+                logging.exception(f"Failed to update Termo race board in channel {race['channel_id']}")
+
+    def _finish_race(self, race: Dict):
+        race["finished"] = True
+        self.races.pop(race["channel_id"], None)
+        self._request_race_render(race)
+
+    async def _race_guess(self, interaction: discord.Interaction, channel_id: int, attempt: str):
+        """Score one racer's guess; the board edit is coalesced with everyone else's"""
+        if not attempt.isalpha() or not self.dictionary.is_valid(attempt):
+            embed = discord.Embed(
+                title="❌ Palavra Inválida",
+                description=f"**{attempt}** não está no dicionário. Tenta outra palavra.",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        race = self.races.get(channel_id)
+        if not race:
+            embed = discord.Embed(
+                title="❌ Sem Corrida",
+                description="Esta corrida já terminou.",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        user_id = interaction.user.id
+        # Per-channel lock: guesses in other channels never wait on this one
+        async with race["lock"]:
+            attempts = race["players"].setdefault(user_id, [])
+            if race["finished"] or len(attempts) >= MAX_ATTEMPTS:
+                embed = discord.Embed(
+                    title="❌ Sem Tentativas",
+                    description="A corrida terminou ou já usaste todas as tuas tentativas.",
+                    color=discord.Color.red()
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
+            attempts.append({"word": attempt, "result": self._check_attempt(race["word"], attempt)})
+            race["last_guess"] = time.monotonic()
+            won = normalize_word(attempt) == normalize_word(race["word"])
+            # Running out of attempts only ends it for this player; the race is open to the
+            # rest of the channel until someone wins, it is stopped or it goes idle
+            if won:
+                race["winner"] = user_id
+                self._finish_race(race)
+            else:
+                self._request_race_render(race)
 
-    def _pick_word(self) -> str:
-        """Pick a random word from the list"""
-        if not self.words:
-            return "termo"  # fallback
-        return random.choice(self.words).upper()
+        # Private board: only the player sees their own letters
+        embed = self._create_game_embed(attempts, len(attempts), won, race["word"], interaction.user)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        if won:
+            await interaction.channel.send(f"🏆 {interaction.user.mention} ganhou a corrida em {len(attempts)} tentativas! A palavra era **{race['word']}**.")
+            await self._give_xp_reward(interaction, len(attempts))
+
+    @_expire_sessions.before_loop
+    async def _before_expire_sessions(self):
+        await self.bot.wait_until_ready()
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(DAILY_TZ).date()
+
+    def _daily_word(self, guild_id: int, day: date) -> str:
+        """Word of the day for a guild: walks a per-guild permutation of the list, one word per day
+
+        Each cycle through the list is shuffled with a seed derived from the guild and
+        cycle number, so every word is used once before any repeats and the answer is
+        the same for everyone without storing it.
+        """
+        key = day.isoformat()
+        cached = self._daily_words.get(guild_id)
+        if cached and cached[0] == key:
+            return cached[1]
+        answers = self.dictionary.answers(DEFAULT_WORD_SIZE)
+        if not answers:
+            return "TERMO"  # fallback
+        cycle, offset = divmod((day - DAILY_EPOCH).days, len(answers))
+        order = list(range(len(answers)))
+        random.Random(f"termo:{guild_id}:{cycle}").shuffle(order)
+        word = answers.words[order[offset]]
+        self._daily_words[guild_id] = (key, word)
+        return word
+
+    def _daily_board(self, guild_id: int, day: str) -> List[Dict]:
+        """Daily results, read once per guild per day and then kept up to date in memory"""
+        cached = self._daily_boards.get(guild_id)
+        if cached and cached[0] == day:
+            return cached[1]
+        results = self.db.get_termo_daily_results(guild_id, day)
+        self._daily_boards[guild_id] = (day, results)
+        return results
+
+    def _record_daily_result(self, guild_id: int, user_id: int, day: str, won: bool, attempts: int):
+        """Store a player's daily result (first one only) and insert it into the cached board"""
+        finished_at = int(time.time())
+        if not self.db.add_termo_daily_result(guild_id, day, user_id, won, attempts, finished_at):
+            return
+        cached = self._daily_boards.get(guild_id)
+        if cached and cached[0] == day:
+            cached[1].append({"user_id": user_id, "won": won, "attempts": attempts, "finished_at": finished_at})
+            cached[1].sort(key=lambda r: (not r["won"], r["attempts"], r["finished_at"]))
 
     def _check_attempt(self, secret_word: str, attempt: str) -> list:
         """
@@ -262,8 +680,9 @@ class Termo(commands.Cog):
         ⬜ = letter not in word
         """
         resultado = []
-        secret_word = secret_word.upper()
-        attempt = attempt.upper()
+        # Accents are ignored: "PRECO" matches "PREÇO"
+        secret_word = normalize_word(secret_word).upper()
+        attempt = normalize_word(attempt).upper()
         
         # Count letter occurrences in secret word
         count = {}
@@ -285,14 +704,57 @@ class Termo(commands.Cog):
         
         return status
 
-    def _create_game_embed(self, attempts: list, num_attempts: int, word_termoed: bool = False, secret_word: str = "", player: Optional[discord.User] = None) -> discord.Embed:
-        """Create embed showing game state"""
+    async def _get_solver(self, size: int) -> TermoSolver:
+        """Build (or load from disk) a length's feedback matrix on first use, off the event loop"""
+        async with self._solver_lock:
+            if size not in self._solvers:
+                loop = asyncio.get_running_loop()
+                self._solvers[size] = await loop.run_in_executor(
+                    None,
+                    lambda: TermoSolver(
+                        self.dictionary.bucket(size), self.dictionary.answers(size).normalized, SOLVER_CACHE_DIR
+                    )
+                )
+            return self._solvers[size]
+
+    @staticmethod
+    def _game_history(game: Dict) -> List[Tuple[str, int]]:
+        return [(att["word"], encode_result(att["result"])) for att in game["attempts"]]
+
+    async def _send_game_analysis(self, interaction: discord.Interaction, game: Dict):
+        """Post-game: candidates left after each guess and how fast the solver would have won
+
+        The solver path spells out the word, so for the daily puzzle only the player sees it.
+        """
+        try:
+            solver = await self._get_solver(game["size"])
+            history = self._game_history(game)
+            remaining = [len(solver.candidates(history[:i])) for i in range(len(history) + 1)]
+            path = await asyncio.get_running_loop().run_in_executor(None, solver.solve, game["word"])
+        except Exception:
+            logging.exception("Termo analysis failed")
+            return
+        embed = discord.Embed(
+            title="🧠 Análise do Jogo",
+            description=(
+                f"Palavras possíveis após cada tentativa: {' → '.join(str(n) for n in remaining)}\n"
+                f"Podias ter acertado em **{len(path)}** tentativas: {' → '.join(word.upper() for word in path)}"
+            ),
+            color=discord.Color.purple()
+        )
+        if game.get("daily"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.channel.send(embed=embed)
+
+    def _create_game_embed(self, attempts: list, num_attempts: int, word_termoed: bool = False, secret_word: str = "", player: Optional[discord.User] = None, hide_letters: bool = False) -> discord.Embed:
+        """Create embed showing game state (hide_letters: only the coloured squares, no word)"""
         if word_termoed:
             color = discord.Color.green()
             title = "🎉 Parabéns! Acertaste a palavra!"
         elif num_attempts >= MAX_ATTEMPTS:
             color = discord.Color.red()
-            title = f"😔 Fim do Jogo! A palavra era: **{secret_word}**"
+            title = "😔 Fim do Jogo!" if hide_letters else f"😔 Fim do Jogo! A palavra era: **{secret_word}**"
         else:
             color = discord.Color.blue()
             title = f"🎮 Jogo - Tentativa {num_attempts}/{MAX_ATTEMPTS}"
@@ -308,7 +770,7 @@ class Termo(commands.Cog):
         # Show previous attempts
         if attempts:
             history = "\n".join([
-                f"{att['word']} {''.join(att['result'])}"
+                ''.join(att['result']) if hide_letters else f"{att['word']} {''.join(att['result'])}"
                 for att in attempts
             ])
             embed.add_field(name="Tentativas", value=history, inline=False)
@@ -317,7 +779,7 @@ class Termo(commands.Cog):
         if not word_termoed and num_attempts < MAX_ATTEMPTS:
             embed.add_field(
                 name="Como Jogar",
-                value=f"Escreve uma palavra com {WORD_SIZE} letras.\n🟩 = Letra correta\n🟨 = Letra existe mas posição errada\n⬜ = Letra não está na palavra",
+                value=f"Escreve uma palavra com {len(normalize_word(secret_word))} letras.\n🟩 = Letra correta\n🟨 = Letra existe mas posição errada\n⬜ = Letra não está na palavra",
                 inline=False
             )
         
@@ -372,9 +834,75 @@ class Termo(commands.Cog):
         except Exception as e:
             logging.exception(f"Error in _give_xp_reward: {e}")
 
+    async def _check_size(self, ctx, size: int) -> bool:
+        """True when the word length has a mode; otherwise tells the player which ones exist"""
+        if size in WORD_SIZES and self.dictionary.answers(size):
+            return True
+        embed = discord.Embed(
+            title="❌ Tamanho Inválido",
+            description=f"Escolhe um tamanho de palavra entre {WORD_SIZES[0]} e {WORD_SIZES[-1]} letras.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return False
+
+    async def _start_game(self, ctx, secret_word: str, daily: Optional[str] = None):
+        """Register a game for the author and send its message with the guess button"""
+        user_id = ctx.author.id
+        size = len(normalize_word(secret_word))
+        self.active_games[user_id] = {
+            "word": secret_word,
+            "size": size,
+            "attempts": [],
+            "channel_id": ctx.channel.id,
+            "guild_id": ctx.guild.id,
+            "message": None,
+            "message_id": None,
+            "daily": daily,
+            "updated_at": int(time.time()),
+        }
+
+        # Create single comprehensive embed with button
+        embed = discord.Embed(
+            title="📅 Termo Diário" if daily else "🎮 Jogo Iniciado!",
+            description=(
+                f"Jogo de {ctx.author.mention}. Adivinha uma palavra de {size} letras em {MAX_ATTEMPTS} tentativas.\n\n"
+                "**Feedback:**\n🟩 letra correta na posição\n🟨 letra existe mas posição errada\n⬜ letra não está na palavra"
+            ),
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Estado",
+            value=f"Tentativas: 0/{MAX_ATTEMPTS}",
+            inline=False
+        )
+        embed.add_field(
+            name="Como Jogar",
+            value="Usa o botão abaixo para enviar as tuas tentativas.",
+            inline=False
+        )
+        if daily:
+            embed.add_field(
+                name="Palavra do Dia",
+                value="Todos no servidor têm a mesma palavra hoje. Só o primeiro jogo conta; vê os resultados com `L!termo_hoje`.",
+                inline=False
+            )
+        embed.set_footer(text="Apenas o dono do jogo pode usar o botão. Usa 'L!termoexit' para sair.")
+
+        # Create view with button
+        view = self._game_view(user_id)
+        logging.info("About to send game message")
+        msg = await ctx.send(embed=embed, view=view)
+        logging.info(f"Game message sent: {msg.id}")
+        # Keep reference to edit later instead of spamming new messages
+        game = self.active_games[user_id]
+        game["message"] = msg
+        game["message_id"] = msg.id
+        self._save_session(user_id, game)
+
     @commands.command(name="termo")
-    async def termo(self, ctx):
-        """Começa um novo jogo de adivinhação de palavras"""
+    async def termo(self, ctx, tamanho: int = DEFAULT_WORD_SIZE):
+        """Começa um novo jogo de adivinhação de palavras (4 a 7 letras)"""
         try:
             logging.info(f"=== TERMO COMMAND STARTED ===")
             user_id = ctx.author.id
@@ -389,46 +917,13 @@ class Termo(commands.Cog):
                 )
                 await ctx.send(embed=embed)
                 return
+            if not await self._check_size(ctx, tamanho):
+                return
             
             # Start new game
-            secret_word = self._pick_word()
+            secret_word = self._pick_word(ctx.guild.id, tamanho)
             logging.info(f"Secret word: {secret_word}")
-            self.active_games[user_id] = {
-                "word": secret_word,
-                "attempts": [],
-                "channel": ctx.channel,
-                "guild_id": ctx.guild.id,
-                "message": None,
-            }
-            
-            # Create single comprehensive embed with button
-            embed = discord.Embed(
-                title="🎮 Jogo Iniciado!",
-                description=(
-                    f"Jogo de {ctx.author.mention}. Adivinha uma palavra de {WORD_SIZE} letras em {MAX_ATTEMPTS} tentativas.\n\n"
-                    "**Feedback:**\n🟩 letra correta na posição\n🟨 letra existe mas posição errada\n⬜ letra não está na palavra"
-                ),
-                color=discord.Color.blue()
-            )
-            embed.add_field(
-                name="Estado",
-                value=f"Tentativas: 0/{MAX_ATTEMPTS}",
-                inline=False
-            )
-            embed.add_field(
-                name="Como Jogar",
-                value="Usa o botão abaixo para enviar as tuas tentativas.",
-                inline=False
-            )
-            embed.set_footer(text="Apenas o dono do jogo pode usar o botão. Usa 'L!termoexit' para sair.")
-            
-            # Create view with button
-            view = TermoGameView(self, user_id, ctx.guild.id)
-            logging.info("About to send game message")
-            msg = await ctx.send(embed=embed, view=view)
-            logging.info(f"Game message sent: {msg.id}")
-            # Keep reference to edit later instead of spamming new messages
-            self.active_games[user_id]["message"] = msg
+            await self._start_game(ctx, secret_word)
             logging.info(f"=== TERMO COMMAND COMPLETED ===")
         except Exception as e:
             logging.exception(f"Error in termo command: {e}")
@@ -442,6 +937,173 @@ class Termo(commands.Cog):
             except:
                 pass
 
+    @commands.command(name="termo_diario", aliases=["termo_daily", "diario"])
+    async def termo_diario(self, ctx):
+        """Joga a palavra do dia do servidor (uma vez por dia)"""
+        if ctx.author.id in self.active_games:
+            embed = discord.Embed(
+                title="❌ Jogo Ativo",
+                description="Já tens um jogo ativo! Termina-o primeiro ou usa `termoexit` para sair.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        today = self._today()
+        day = today.isoformat()
+        played = next((r for r in self._daily_board(ctx.guild.id, day) if r["user_id"] == ctx.author.id), None)
+        if played:
+            outcome = f"acertaste em {played['attempts']}/{MAX_ATTEMPTS}" if played["won"] else "não acertaste"
+            embed = discord.Embed(
+                title="📅 Termo Diário",
+                description=f"Já jogaste hoje ({outcome}). Volta amanhã! Vê os resultados com `L!termo_hoje`.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await self._start_game(ctx, self._daily_word(ctx.guild.id, today), daily=day)
+
+    @commands.command(name="termo_hoje", aliases=["termo_board"])
+    async def termo_hoje(self, ctx):
+        """Mostra os resultados do Termo diário de hoje no servidor"""
+        day = self._today().isoformat()
+        results = self._daily_board(ctx.guild.id, day)
+        if not results:
+            embed = discord.Embed(
+                title="📅 Termo Diário",
+                description="Ainda ninguém jogou a palavra de hoje. Começa com `L!termo_diario`!",
+                color=discord.Color.blue()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        lines = []
+        for i, result in enumerate(results[:20], 1):
+            member = ctx.guild.get_member(result["user_id"])
+            name = member.display_name if member else f"Utilizador {result['user_id']}"
+            score = f"{result['attempts']}/{MAX_ATTEMPTS}" if result["won"] else f"X/{MAX_ATTEMPTS}"
+            medal = ["🥇", "🥈", "🥉"][i-1] if i <= 3 and result["won"] else f"{i}."
+            lines.append(f"{medal} **{name}** — {score}")
+
+        wins = sum(1 for r in results if r["won"])
+        embed = discord.Embed(
+            title=f"📅 Termo Diário — {day}",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"{len(results)} jogadores · {wins} acertaram")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="termo_corrida", aliases=["termo_race", "corrida"])
+    async def termo_corrida(self, ctx, tamanho: int = DEFAULT_WORD_SIZE):
+        """Começa uma corrida: todos no canal adivinham a mesma palavra"""
+        if ctx.channel.id in self.races:
+            embed = discord.Embed(
+                title="❌ Corrida Ativa",
+                description="Já há uma corrida neste canal!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        if not await self._check_size(ctx, tamanho):
+            return
+
+        race = {
+            "word": self._pick_word(ctx.guild.id, tamanho),
+            "size": tamanho,
+            "channel_id": ctx.channel.id,
+            "guild_id": ctx.guild.id,
+            "starter_id": ctx.author.id,
+            "players": {},  # {user_id: [{"word", "result"}]}
+            "winner": None,
+            "finished": False,
+            "lock": asyncio.Lock(),
+            "message": None,
+            "dirty": False,
+            "render_task": None,
+            "last_edit": 0.0,
+            "last_guess": time.monotonic(),
+        }
+        self.races[ctx.channel.id] = race
+        try:
+            race["message"] = await ctx.send(embed=self._race_embed(race), view=self._race_view(ctx.channel.id))
+            race["last_edit"] = time.monotonic()
+        except Exception:
+            self.races.pop(ctx.channel.id, None)
+            raise
+
+    @commands.command(name="termo_corrida_parar", aliases=["termo_race_stop", "parar_corrida"])
+    async def termo_corrida_parar(self, ctx):
+        """Termina a corrida do canal e revela a palavra"""
+        race = self.races.get(ctx.channel.id)
+        if not race:
+            embed = discord.Embed(
+                title="❌ Sem Corrida",
+                description="Não há nenhuma corrida neste canal.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        if ctx.author.id != race["starter_id"] and not ctx.author.guild_permissions.manage_messages:
+            embed = discord.Embed(
+                title="❌ Sem Permissão",
+                description="Só quem começou a corrida ou um moderador a pode terminar.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        async with race["lock"]:
+            if race["finished"]:
+                return
+            self._finish_race(race)
+        await ctx.send(f"🏁 Corrida terminada! A palavra era **{race['word']}**.")
+
+    @commands.command(name="termo_hint", aliases=["dica"])
+    async def termo_hint(self, ctx):
+        """Sugere a melhor próxima tentativa do teu jogo"""
+        game = self.active_games.get(ctx.author.id)
+        if not game:
+            embed = discord.Embed(
+                title="❌ Sem Jogo Ativo",
+                description="Não tens nenhum jogo ativo. Começa um com `L!termo`.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        if game.get("daily"):
+            embed = discord.Embed(
+                title="💡 Dica",
+                description="Não há dicas no Termo diário; todos jogam em pé de igualdade.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        solver = await self._get_solver(game["size"])
+        candidates = solver.candidates(self._game_history(game))
+        if len(candidates) == 0:
+            embed = discord.Embed(
+                title="💡 Dica",
+                description="Não há sugestões para este jogo.",
+                color=discord.Color.orange()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        guess, bits = solver.best_guess(candidates)
+        game["hints"] = game.get("hints", 0) + 1
+        embed = discord.Embed(
+            title="💡 Dica",
+            description=(
+                f"Palavras possíveis: **{len(candidates)}**\n"
+                f"Melhor tentativa: **{guess.upper()}** ({bits:.2f} bits de informação)"
+            ),
+            color=discord.Color.gold()
+        )
+        await ctx.send(embed=embed)
+
     @commands.command(name="termo_quit")
     async def termo_exit(self, ctx):
         """Sai do jogo atual"""
@@ -456,8 +1118,23 @@ class Termo(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        word = self.active_games[user_id]["word"]
-        del self.active_games[user_id]
+        game = self._end_session(user_id)
+        word = game["word"]
+        if game.get("daily"):
+            # Quitting the daily puzzle counts as a loss so it can't be retried
+            self._record_daily_result(game["guild_id"], user_id, game["daily"], False, len(game["attempts"]))
+            # Others may still be playing today's word: reveal it by DM only
+            embed = discord.Embed(
+                title="😔 Jogo Cancelado",
+                description="Cancelaste o Termo Diário. A palavra foi-te enviada por mensagem privada.",
+                color=discord.Color.orange()
+            )
+            try:
+                await ctx.author.send(f"📅 A palavra do Termo Diário era: **{word}**")
+            except discord.HTTPException:
+                embed.description = "Cancelaste o Termo Diário."
+            await ctx.send(embed=embed)
+            return
         
         embed = discord.Embed(
             title="😔 Jogo Cancelado",
@@ -499,6 +1176,17 @@ class Termo(commands.Cog):
         
         if wins > 0:
             embed.add_field(name="🎯 Média de Tentativas", value=f"{avg_attempts:.1f}", inline=True)
+        embed.add_field(name="🔥 Sequência Atual", value=str(data["current_streak"]), inline=True)
+        embed.add_field(name="🏅 Melhor Sequência", value=str(data["max_streak"]), inline=True)
+
+        distribution = data["distribution"]
+        if any(distribution):
+            top = max(distribution)
+            bars = "\n".join(
+                f"`{n}` {'🟩' * max(1, round(count / top * 10)) if count else '⬜'} {count}"
+                for n, count in enumerate(distribution, 1)
+            )
+            embed.add_field(name="📊 Distribuição de Tentativas", value=bars, inline=False)
         
         embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
         
@@ -39,6 +39,23 @@ class Database:
             )
         """)
 
+        # Estatísticas dos jogos rápidos (ppt, dado, moeda...); o Guess usa guess_stats
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS game_stats (
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                game TEXT NOT NULL,
+                games INTEGER DEFAULT 0,
+                wins INTEGER DEFAULT 0,
+                losses INTEGER DEFAULT 0,
+                draws INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id, game)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_game_stats_rank ON game_stats (guild_id, game, wins DESC)"
+        )
+
         # Tabela de estatísticas do jogo Termo
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS termo_stats (
@@ -47,10 +64,111 @@ class Database:
                 games INTEGER DEFAULT 0,
                 wins INTEGER DEFAULT 0,
                 total_attempts INTEGER DEFAULT 0,
+                current_streak INTEGER DEFAULT 0,
+                max_streak INTEGER DEFAULT 0,
+                dist_1 INTEGER DEFAULT 0,
+                dist_2 INTEGER DEFAULT 0,
+                dist_3 INTEGER DEFAULT 0,
+                dist_4 INTEGER DEFAULT 0,
+                dist_5 INTEGER DEFAULT 0,
+                dist_6 INTEGER DEFAULT 0,
                 PRIMARY KEY (guild_id, user_id)
             )
         """)
 
+        # Resultados do Termo diário (um por jogador, por servidor, por dia)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS termo_daily (
+                guild_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                won INTEGER NOT NULL,
+                attempts INTEGER NOT NULL,
+                finished_at INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, day, user_id)
+            )
+        """)
+
+        # Sequências e distribuição de tentativas do Termo (bases de dados antigas)
+        cursor.execute("PRAGMA table_info(termo_stats)")
+        if "current_streak" not in {row[1] for row in cursor.fetchall()}:
+            self._migrate_termo_streaks(cursor)
+
+        # Jogos de Termo em curso (sobrevivem a reinícios do bot)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS termo_sessions (
+                user_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                message_id INTEGER,
+                word TEXT NOT NULL,
+                attempts TEXT NOT NULL DEFAULT '',
+                daily TEXT,
+                updated_at INTEGER NOT NULL
+            )
+        """)
+
+        # Saco de palavras do Termo por servidor e tamanho (semente + posição na permutação)
+        cursor.execute("PRAGMA table_info(termo_bags)")
+        bag_columns = {row[1] for row in cursor.fetchall()}
+        if bag_columns and "size" not in bag_columns:
+            # Versão antiga, só com palavras de 5 letras
+            cursor.execute("ALTER TABLE termo_bags RENAME TO termo_bags_old")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS termo_bags (
+                guild_id INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                seed INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                words_hash TEXT NOT NULL,
+                PRIMARY KEY (guild_id, size)
+            )
+        """)
+        if bag_columns and "size" not in bag_columns:
+            cursor.execute("""
+                INSERT INTO termo_bags (guild_id, size, seed, position, words_hash)
+                SELECT guild_id, 5, seed, position, words_hash FROM termo_bags_old
+            """)
+            cursor.execute("DROP TABLE termo_bags_old")
+
+        # Registo incremental das filas de música (append/remove + snapshots)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS music_queue_log (
+                guild_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                payload TEXT,
+                PRIMARY KEY (guild_id, seq)
+            )
+        """)
+
+        # Histórico de reproduções de música (para aquecer a cache de extração)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS music_play_history (
+                guild_id INTEGER NOT NULL,
+                track_id TEXT NOT NULL,
+                title TEXT,
+                webpage_url TEXT,
+                played_at INTEGER NOT NULL,
+                seconds_played REAL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_music_play_history_guild
+            ON music_play_history (guild_id, played_at)
+        """)
+
+        # Correspondência Spotify -> YouTube (cada música só é pesquisada uma vez)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spotify_tracks (
+                spotify_id TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                title TEXT,
+                duration REAL,
+                resolved_at INTEGER NOT NULL
+            )
+        """)
+
         # Tabela de regras (opcional, para futuro)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS server_config (
@@ -258,6 +376,80 @@ class Database:
             for row in rows
         ]
 
+    def add_game_results(self, results: List[Tuple[int, int, str, str]]):
+        """Aplica um lote de resultados (guild_id, user_id, jogo, resultado) numa só transação
+
+        O resultado é "win", "loss", "draw" ou "play" (jogos sem vencedor). Os resultados do
+        mesmo jogador e jogo são somados antes de escrever; o jogo "adivinhar" vai para guess_stats.
+        """
+        if not results:
+            return
+        totals: Dict[Tuple[int, int, str], List[int]] = {}
+        for guild_id, user_id, game, outcome in results:
+            row = totals.setdefault((guild_id, user_id, game), [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += outcome == "win"
+            row[2] += outcome == "loss"
+            row[3] += outcome == "draw"
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO guess_stats (guild_id, user_id, games, wins, total_attempts)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                games = games + excluded.games,
+                wins = wins + excluded.wins,
+                total_attempts = total_attempts + excluded.total_attempts
+            """,
+            # Um palpite por jogo
+            [(g, u, row[0], row[1], row[0]) for (g, u, game), row in totals.items() if game == "adivinhar"]
+        )
+        cursor.executemany(
+            """
+            INSERT INTO game_stats (guild_id, user_id, game, games, wins, losses, draws)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id, game) DO UPDATE SET
+                games = games + excluded.games,
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                draws = draws + excluded.draws
+            """,
+            [(g, u, game, *row) for (g, u, game), row in totals.items() if game != "adivinhar"]
+        )
+        conn.commit()
+        conn.close()
+
+    def get_game_leaderboard(self, guild_id: int, game: str, limit: int = 10) -> List[Dict]:
+        """Retorna os melhores jogadores de um jogo rápido num servidor (mais vitórias, depois mais jogos)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if game == "adivinhar":
+            cursor.execute(
+                """
+                SELECT user_id, games, wins, games - wins, 0 FROM guess_stats
+                WHERE guild_id = ? AND games > 0
+                ORDER BY wins DESC, games DESC LIMIT ?
+                """,
+                (guild_id, limit)
+            )
+        else:
+            cursor.execute(
+                """
+                SELECT user_id, games, wins, losses, draws FROM game_stats
+                WHERE guild_id = ? AND game = ?
+                ORDER BY wins DESC, games DESC LIMIT ?
+                """,
+                (guild_id, game, limit)
+            )
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {"user_id": row[0], "games": row[1], "wins": row[2], "losses": row[3], "draws": row[4]}
+            for row in rows
+        ]
+
     def migrate_guess_from_json(self, json_path: str = "data/game_data.json") -> bool:
         """Migra estatísticas antigas do Guess (JSON) para SQLite"""
         if not os.path.exists(json_path):
@@ -298,23 +490,88 @@ class Database:
         print(f"✅ Migradas {migrated} estatísticas de Guess para SQLite")
         return True
 
+    @staticmethod
+    def _migrate_termo_streaks(cursor: sqlite3.Cursor):
+        """Adiciona as colunas de sequência e distribuição e preenche o que o histórico permite
+
+        Quem nunca perdeu tem uma sequência igual às vitórias; a distribuição vem dos
+        resultados do Termo diário, o único histórico de jogos guardado.
+        """
+        for column in ["current_streak", "max_streak"] + [f"dist_{n}" for n in range(1, 7)]:
+            cursor.execute(f"ALTER TABLE termo_stats ADD COLUMN {column} INTEGER DEFAULT 0")
+        cursor.execute(
+            "UPDATE termo_stats SET current_streak = wins, max_streak = wins WHERE games > 0 AND wins = games"
+        )
+        for n in range(1, 7):
+            cursor.execute(
+                f"""
+                UPDATE termo_stats SET dist_{n} = (
+                    SELECT COUNT(*) FROM termo_daily d
+                    WHERE d.guild_id = termo_stats.guild_id AND d.user_id = termo_stats.user_id
+                        AND d.won = 1 AND d.attempts = ?
+                )
+                """,
+                (n,)
+            )
+
     # ===== MÉTODOS DO JOGO TERMO =====
 
     def get_termo_stats(self, guild_id: int, user_id: int) -> Dict:
-        """Lê estatísticas do jogo Termo"""
+        """Lê estatísticas do jogo Termo (uma linha, já com sequências e distribuição)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT games, wins, total_attempts FROM termo_stats WHERE guild_id = ? AND user_id = ?",
+            """
+            SELECT games, wins, total_attempts, current_streak, max_streak,
+                   dist_1, dist_2, dist_3, dist_4, dist_5, dist_6
+            FROM termo_stats WHERE guild_id = ? AND user_id = ?
+            """,
             (guild_id, user_id)
         )
         row = cursor.fetchone()
         conn.close()
 
         if row:
-            return {"games": row[0], "wins": row[1], "total_attempts": row[2]}
+            return {
+                "games": row[0],
+                "wins": row[1],
+                "total_attempts": row[2],
+                "current_streak": row[3],
+                "max_streak": row[4],
+                "distribution": list(row[5:11]),
+            }
 
-        return {"games": 0, "wins": 0, "total_attempts": 0}
+        return {"games": 0, "wins": 0, "total_attempts": 0, "current_streak": 0, "max_streak": 0, "distribution": [0] * 6}
+
+    def record_termo_game(self, guild_id: int, user_id: int, won: bool, attempts: int):
+        """Regista um jogo terminado numa só escrita: totais, sequências e distribuição"""
+        dist = [int(won and attempts == n) for n in range(1, 7)]
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO termo_stats (
+                guild_id, user_id, games, wins, total_attempts, current_streak, max_streak,
+                dist_1, dist_2, dist_3, dist_4, dist_5, dist_6
+            )
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                games = games + 1,
+                wins = wins + excluded.wins,
+                total_attempts = total_attempts + excluded.total_attempts,
+                current_streak = CASE WHEN excluded.wins THEN current_streak + 1 ELSE 0 END,
+                max_streak = MAX(max_streak, CASE WHEN excluded.wins THEN current_streak + 1 ELSE 0 END),
+                dist_1 = dist_1 + excluded.dist_1,
+                dist_2 = dist_2 + excluded.dist_2,
+                dist_3 = dist_3 + excluded.dist_3,
+                dist_4 = dist_4 + excluded.dist_4,
+                dist_5 = dist_5 + excluded.dist_5,
+                dist_6 = dist_6 + excluded.dist_6
+            """,
+            (guild_id, user_id, int(won), attempts if won else 0, int(won), int(won), *dist)
+        )
+        conn.commit()
+        conn.close()
 
     def set_termo_stats(self, guild_id: int, user_id: int, games: int, wins: int, total_attempts: int):
         """Grava estatísticas do jogo Termo"""
@@ -395,5 +652,265 @@ class Database:
         print(f"✅ Migradas {migrated} estatísticas de Termo para SQLite")
         return True
 
+    def add_termo_daily_result(self, guild_id: int, day: str, user_id: int, won: bool, attempts: int, finished_at: int) -> bool:
+        """Guarda o resultado diário de um jogador; retorna False se já existia"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO termo_daily (guild_id, day, user_id, won, attempts, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (guild_id, day, user_id, int(won), attempts, finished_at)
+        )
+        inserted = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return inserted
+
+    def get_termo_daily_results(self, guild_id: int, day: str) -> List[Dict]:
+        """Retorna os resultados diários de um servidor, do melhor para o pior"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT user_id, won, attempts, finished_at FROM termo_daily
+            WHERE guild_id = ? AND day = ?
+            ORDER BY won DESC, attempts ASC, finished_at ASC
+            """,
+            (guild_id, day)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {"user_id": row[0], "won": bool(row[1]), "attempts": row[2], "finished_at": row[3]}
+            for row in rows
+        ]
+
+    def save_termo_session(self, user_id: int, guild_id: int, channel_id: int, message_id: Optional[int], word: str, attempts: List[str], daily: Optional[str], updated_at: int):
+        """Guarda (ou atualiza) o jogo em curso de um jogador; as tentativas ficam separadas por vírgulas"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO termo_sessions (user_id, guild_id, channel_id, message_id, word, attempts, daily, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                guild_id = excluded.guild_id,
+                channel_id = excluded.channel_id,
+                message_id = excluded.message_id,
+                word = excluded.word,
+                attempts = excluded.attempts,
+                daily = excluded.daily,
+                updated_at = excluded.updated_at
+            """,
+            (user_id, guild_id, channel_id, message_id, word, ",".join(attempts), daily, updated_at)
+        )
+        conn.commit()
+        conn.close()
+
+    def delete_termo_session(self, user_id: int):
+        """Remove o jogo em curso de um jogador"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM termo_sessions WHERE user_id = ?", (user_id,))
+        conn.commit()
+        conn.close()
+
+    def get_termo_sessions(self) -> List[Dict]:
+        """Retorna todos os jogos de Termo em curso"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT user_id, guild_id, channel_id, message_id, word, attempts, daily, updated_at FROM termo_sessions"
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {
+                "user_id": row[0],
+                "guild_id": row[1],
+                "channel_id": row[2],
+                "message_id": row[3],
+                "word": row[4],
+                "attempts": row[5].split(",") if row[5] else [],
+                "daily": row[6],
+                "updated_at": row[7],
+            }
+            for row in rows
+        ]
+
+    def get_termo_bag(self, guild_id: int, size: int) -> Optional[Dict]:
+        """Retorna o estado do saco de palavras de um servidor para um tamanho de palavra"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT seed, position, words_hash FROM termo_bags WHERE guild_id = ? AND size = ?",
+            (guild_id, size)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return None
+        return {"seed": row[0], "position": row[1], "words_hash": row[2]}
+
+    def set_termo_bag(self, guild_id: int, size: int, seed: int, position: int, words_hash: str):
+        """Guarda o estado do saco de palavras de um servidor para um tamanho de palavra"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO termo_bags (guild_id, size, seed, position, words_hash) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, size) DO UPDATE SET
+                seed = excluded.seed,
+                position = excluded.position,
+                words_hash = excluded.words_hash
+            """,
+            (guild_id, size, seed, position, words_hash)
+        )
+        conn.commit()
+        conn.close()
+
+    # ===== MÉTODOS DA FILA DE MÚSICA =====
+
+    def append_music_log(self, guild_id: int, op: str, payload: Optional[str] = None):
+        """Acrescenta uma operação ao registo da fila de um servidor"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO music_queue_log (guild_id, seq, op, payload)
+            VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM music_queue_log WHERE guild_id = ?), ?, ?)
+            """,
+            (guild_id, guild_id, op, payload)
+        )
+        conn.commit()
+        conn.close()
+
+    def get_music_log(self, guild_id: int) -> List[Tuple[str, Optional[str]]]:
+        """Lê o registo da fila de um servidor, por ordem (op, payload)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT op, payload FROM music_queue_log WHERE guild_id = ? ORDER BY seq",
+            (guild_id,)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def get_music_log_guilds(self) -> List[int]:
+        """Retorna os servidores com estado de fila guardado"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT guild_id FROM music_queue_log")
+        rows = cursor.fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def compact_music_log(self, guild_id: int, snapshot: str):
+        """Substitui o registo de um servidor por um único snapshot"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM music_queue_log WHERE guild_id = ?", (guild_id,))
+        cursor.execute(
+            "INSERT INTO music_queue_log (guild_id, seq, op, payload) VALUES (?, 1, 'snapshot', ?)",
+            (guild_id, snapshot)
+        )
+        conn.commit()
+        conn.close()
+
+    def clear_music_log(self, guild_id: int):
+        """Apaga o registo da fila de um servidor"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM music_queue_log WHERE guild_id = ?", (guild_id,))
+        conn.commit()
+        conn.close()
+
+    # ===== MÉTODOS DO HISTÓRICO DE MÚSICA =====
+
+    def add_music_plays(self, plays: List[Tuple[int, str, Optional[str], Optional[str], int, float]]):
+        """Insere um lote de reproduções (guild_id, track_id, title, webpage_url, played_at, seconds_played)"""
+        if not plays:
+            return
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO music_play_history (guild_id, track_id, title, webpage_url, played_at, seconds_played)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            plays
+        )
+        conn.commit()
+        conn.close()
+
+    def get_top_tracks(self, guild_id: int, limit: int = 10, since: int = 0) -> List[Dict]:
+        """Retorna as músicas mais tocadas de um servidor desde o timestamp `since`"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT track_id, title, webpage_url, COUNT(*) AS plays, SUM(seconds_played) AS seconds
+            FROM music_play_history
+            WHERE guild_id = ? AND played_at >= ?
+            GROUP BY track_id
+            ORDER BY plays DESC, seconds DESC
+            LIMIT ?
+            """,
+            (guild_id, since, limit)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {"track_id": r[0], "title": r[1], "webpage_url": r[2], "plays": r[3], "seconds": r[4] or 0}
+            for r in rows
+        ]
+
+    def get_music_history_guilds(self, since: int = 0) -> List[int]:
+        """Retorna os servidores com reproduções desde o timestamp `since`"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT guild_id FROM music_play_history WHERE played_at >= ?", (since,))
+        rows = cursor.fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    # ===== MÉTODOS DO SPOTIFY =====
+
+    def get_spotify_mappings(self, spotify_ids: List[str]) -> Dict[str, Dict]:
+        """Retorna {spotify_id: {video_id, title, duration}} das músicas já pesquisadas"""
+        mappings = {}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        # Em blocos para não exceder o limite de parâmetros do SQLite
+        for i in range(0, len(spotify_ids), 500):
+            chunk = spotify_ids[i:i + 500]
+            cursor.execute(
+                f"SELECT spotify_id, video_id, title, duration FROM spotify_tracks WHERE spotify_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                mappings[row[0]] = {"video_id": row[1], "title": row[2], "duration": row[3]}
+        conn.close()
+        return mappings
+
+    def set_spotify_mappings(self, mappings: List[Tuple[str, str, Optional[str], Optional[float], int]]):
+        """Guarda um lote de correspondências (spotify_id, video_id, title, duration, resolved_at)"""
+        if not mappings:
+            return
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO spotify_tracks (spotify_id, video_id, title, duration, resolved_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            mappings
+        )
+        conn.commit()
+        conn.close()
+
 
 __all__ = ["Database"]
@@ -0,0 +1,188 @@
+"""
+Size-bounded on-disk cache of Opus audio for frequently played tracks
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def track_key(track: Dict[str, Any]) -> Optional[str]:
+    """Stable identifier for a track (YouTube video id when possible)"""
+    url = track.get("webpage_url")
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.netloc.endswith("youtu.be"):
+        video_id = parsed.path.lstrip("/")
+        if video_id:
+            return video_id
+    if "youtube.com" in parsed.netloc:
+        video_id = parse_qs(parsed.query).get("v", [None])[0]
+        if video_id:
+            return video_id
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+class AudioCache:
+    """Keeps Opus files of tracks played at least `min_plays` times, evicting the least recently used"""
+
+    SUFFIX = ".opus"
+    INDEX_FILE = "titles.json"
+
+    def __init__(self, directory: str, max_bytes: int, min_plays: int = 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = max(1, min_plays)
+        self.entries: "OrderedDict[str, int]" = OrderedDict()  # {key: size in bytes}, LRU first
+        self.play_counts: Dict[str, int] = {}
+        self.titles: Dict[str, Tuple[str, str]] = {}  # {key: (title, webpage_url)} for autocomplete
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+        self._pending: set = set()
+        self._lock = asyncio.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.SUFFIX}")
+
+    def _scan(self):
+        """Index files left from previous runs, oldest access first"""
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            if not name.endswith(self.SUFFIX):
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_atime, name[: -len(self.SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                titles = json.load(f)
+            self.titles = {key: tuple(value) for key, value in titles.items() if key in self.entries}
+        except (OSError, ValueError):
+            pass
+        self._evict()
+        logging.info("Audio cache: %s files, %s bytes", len(self.entries), self.total_bytes)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            self.titles.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                logging.exception("Failed to evict cached audio %s", key)
+
+    def _save_titles(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self.titles, f, ensure_ascii=False)
+            os.replace(f"{path}.tmp", path)
+        except OSError:
+            logging.exception("Failed to save audio cache titles")
+
+    def cached_tracks(self) -> List[Tuple[str, str]]:
+        """(title, webpage_url) of every cached track, least recently used first"""
+        return [self.titles[key] for key in self.entries if key in self.titles]
+
+    def contains(self, track: Dict[str, Any]) -> bool:
+        """Whether a track is cached, without counting a hit or touching its LRU position"""
+        key = track_key(track)
+        return bool(key) and key in self.entries
+
+    def lookup(self, track: Dict[str, Any]) -> Optional[str]:
+        """Return the local file for a track, marking it as recently used"""
+        key = track_key(track)
+        if key and key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self._path(key)
+        self.misses += 1
+        return None
+
+    def record_play(self, track: Dict[str, Any]) -> bool:
+        """Count a play; returns True when the track just became worth caching"""
+        key = track_key(track)
+        if not key:
+            return False
+        self.play_counts[key] = self.play_counts.get(key, 0) + 1
+        return (
+            self.play_counts[key] >= self.min_plays
+            and key not in self.entries
+            and key not in self._pending
+        )
+
+    async def store(self, track: Dict[str, Any], stream_url: str, before_options: str = "", copy: bool = False):
+        """Download a track to Opus in the background (remuxed when the source is already Opus)"""
+        key = track_key(track)
+        if not key or key in self._pending:
+            return
+        self._pending.add(key)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            # One download at a time so caching never competes with live playback
+            async with self._lock:
+                codec_args = ["-c:a", "copy"] if copy else ["-c:a", "libopus", "-b:a", "128k"]
+                args = [*before_options.split(), "-i", stream_url, "-vn", *codec_args,
+                        "-f", "opus", "-loglevel", "error", "-y", tmp_path]
+                process = await asyncio.create_subprocess_exec(
+                    "ffmpeg", *args,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await process.communicate()
+                if process.returncode != 0:
+                    raise RuntimeError(stderr.decode("utf-8", "ignore")[:300])
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            if size > self.max_bytes:
+                os.remove(path)
+                return
+            self.entries[key] = size
+            self.total_bytes += size
+            if track.get("title") and track.get("webpage_url"):
+                self.titles[key] = (track["title"], track["webpage_url"])
+            self._evict()
+            self._save_titles()
+            logging.info("Cached audio for %s (%s bytes)", track.get("title"), size)
+        except Exception:
+            self.failures += 1
+            logging.exception("Failed to cache audio for %s", track.get("title"))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            self._pending.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            "evictions": self.evictions,
+            "failures": self.failures,
+            "pending": len(self._pending),
+        }
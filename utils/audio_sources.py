@@ -0,0 +1,172 @@
+"""
+Reusable discord.AudioSource wrappers for the music cog
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+import discord
+
+
+class PrewarmedSource(discord.AudioSource):
+    """Reads the first frames of a source ahead of time so playback starts without waiting on FFmpeg"""
+
+    def __init__(self, original: discord.AudioSource):
+        self.original = original
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._exhausted = False
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def warm(self, frames: int):
+        """Blocking: buffer up to `frames` frames (run in an executor)"""
+        with self._lock:
+            while len(self._buffer) < frames:
+                data = self.original.read()
+                if not data:
+                    self._exhausted = True
+                    break
+                self._buffer.append(data)
+
+    def read(self) -> bytes:
+        if self._buffer:
+            return self._buffer.popleft()
+        if self._exhausted:
+            return b""
+        with self._lock:
+            return self.original.read()
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        self._buffer.clear()
+        self.original.cleanup()
+
+
+class MonitoredSource(discord.AudioSource):
+    """Counts frames actually handed to the voice client, reports the first one and notes end of stream"""
+
+    def __init__(self, original: discord.AudioSource, on_first_frame: Optional[Callable[[], None]] = None):
+        self.original = original
+        self.on_first_frame = on_first_frame
+        self.frames = 0
+        self.first_frame_at: Optional[float] = None
+        self.last_frame_at: Optional[float] = None
+        self.eof = False  # the source ran out, as opposed to being stopped by the voice client
+
+    def read(self) -> bytes:
+        data = self.original.read()
+        if not data:
+            self.eof = True
+        else:
+            now = time.monotonic()
+            self.frames += 1
+            self.last_frame_at = now
+            if self.first_frame_at is None:
+                self.first_frame_at = now
+                if self.on_first_frame:
+                    self.on_first_frame()
+        return data
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        self.original.cleanup()
+
+
+class BroadcastSource:
+    """Reads one Opus source once and fans its frames out to many voice clients"""
+
+    def __init__(
+        self,
+        original: discord.AudioSource,
+        next_source: Optional[Callable[[], Optional[discord.AudioSource]]] = None,
+        on_empty: Optional[Callable[[], None]] = None,
+        backlog: int = 250
+    ):
+        if not original.is_opus():
+            raise ValueError("BroadcastSource requires an Opus source")
+        self.original: Optional[discord.AudioSource] = original
+        self.next_source = next_source
+        self.on_empty = on_empty
+        self.subscribers: set = set()
+        self.frames_read = 0
+        self._frames: deque = deque(maxlen=backlog)
+        self._base = 0  # absolute index of self._frames[0]
+        self._lock = threading.Lock()
+        self._ended = False
+
+    def subscribe(self) -> "BroadcastSubscriber":
+        """New listeners join at the live edge"""
+        with self._lock:
+            subscriber = BroadcastSubscriber(self, self._base + len(self._frames))
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: "BroadcastSubscriber"):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+            empty = not self.subscribers
+        if empty and self.on_empty:
+            self.on_empty()
+
+    def _pull(self) -> bool:
+        """Read the next frame from the source (lock held); returns False at the end of the stream"""
+        while self.original is not None:
+            data = self.original.read()
+            if data:
+                if len(self._frames) == self._frames.maxlen:
+                    self._base += 1
+                self._frames.append(data)
+                self.frames_read += 1
+                return True
+            self.original.cleanup()
+            self.original = self.next_source() if self.next_source else None
+        self._ended = True
+        return False
+
+    def read_at(self, index: int) -> Tuple[bytes, int]:
+        """Frame at an absolute index and the index it was actually served from"""
+        with self._lock:
+            # The first subscriber to reach the live edge pulls; the rest read the shared backlog
+            while index >= self._base + len(self._frames):
+                if self._ended or not self._pull():
+                    return b"", index
+            # Subscribers that fall behind the backlog skip ahead instead of stalling everyone
+            index = max(index, self._base)
+            return self._frames[index - self._base], index
+
+    def cleanup(self):
+        with self._lock:
+            self._ended = True
+            self._frames.clear()
+            if self.original is not None:
+                self.original.cleanup()
+                self.original = None
+
+
+class BroadcastSubscriber(discord.AudioSource):
+    """One voice client's read cursor into a BroadcastSource"""
+
+    def __init__(self, broadcast: BroadcastSource, cursor: int):
+        self.broadcast = broadcast
+        self.cursor = cursor
+
+    def read(self) -> bytes:
+        data, index = self.broadcast.read_at(self.cursor)
+        if data:
+            self.cursor = index + 1
+        return data
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        self.broadcast.unsubscribe(self)
@@ -45,9 +45,7 @@ class MusicPlayerView(discord.ui.View):
     async def stop_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         vc = interaction.guild.voice_client
         if vc:
-            queue = self.music_cog.queues.get(interaction.guild_id, [])
-            queue.clear()
-            self.music_cog.current.pop(interaction.guild_id, None)
+            self.music_cog._reset_guild(interaction.guild_id)
             vc.stop()
             await vc.disconnect()
             await interaction.response.defer()
@@ -55,6 +53,52 @@ class MusicPlayerView(discord.ui.View):
             await interaction.response.send_message("❌ Not in voice channel", ephemeral=True)
 
 
+class QueueView(discord.ui.View):
+    """Music queue navigator that renders each page on demand from the live queue"""
+
+    def __init__(self, music_cog: commands.Cog, guild_id: int, page_size: int = 10, timeout: int = 180):
+        super().__init__(timeout=timeout)
+        self.music_cog = music_cog
+        self.guild_id = guild_id
+        self.page_size = page_size
+        self.current_page = 0
+        self.message = None
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.music_cog._get_queue(self.guild_id)) // self.page_size))
+
+    def render(self) -> discord.Embed:
+        # The queue may have changed since the last click
+        self.current_page = min(self.current_page, self.page_count - 1)
+        self.previous.disabled = self.current_page == 0
+        self.next.disabled = self.current_page >= self.page_count - 1
+        return self.music_cog._render_queue_page(self.guild_id, self.current_page, self.page_size)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.grey)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.current_page = max(0, self.current_page - 1)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="▶ Next", style=discord.ButtonStyle.grey)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.current_page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="🔄", style=discord.ButtonStyle.grey)
+    async def refresh(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def on_timeout(self):
+        if self.message:
+            for item in self.children:
+                item.disabled = True
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+
 class ConfirmView(discord.ui.View):
     """Simple Yes/No confirmation dialog"""
     
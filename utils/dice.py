@@ -0,0 +1,399 @@
+"""
+Dice notation parser, vectorised roller and exact outcome distributions
+
+Supported notation (terms joined with + or -):
+
+    NdM     N dice with M sides (N defaults to 1, d% is d100)
+    khX klX keep the X highest / lowest dice (k is kh; X defaults to 1)
+    dhX dlX drop the X highest / lowest dice
+    !       exploding: a die showing M is rolled again and added
+    rX      reroll once every die showing X or less (r alone is r1)
+    C       constant modifier
+
+For example "4d6kh3", "2d20kl1+5", "3d6!" and "8d10r2-1".
+"""
+
+import math
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 100
+MAX_TERMS = 10
+MAX_DICE = 100_000  # all terms combined
+MAX_SIDES = 10_000
+MAX_CONSTANT = 1_000_000
+MAX_EXPLOSIONS = 100_000  # extra rolls per expression; further explosions are ignored
+
+# Exact distributions
+STATS_MAX_OUTCOMES = 1_000_000  # width of the final distribution
+STATS_MAX_KEEP_WORK = 200_000_000  # array elements touched by the keep/drop DP
+STATS_MAX_KEEP_STEPS = 5_000  # numpy calls (faces x kept dice) made by the keep/drop DP
+STATS_EXPLODE_TAIL = 1e-12  # explosion chains less likely than this are left out
+
+TERM_RE = re.compile(r"([+-])(?:(\d*)d(\d+|%)((?:kh|kl|dh|dl|k|!|r)\d*)*|(\d+))")
+MODIFIER_RE = re.compile(r"(kh|kl|dh|dl|k|!|r)(\d*)")
+
+
+class DiceError(ValueError):
+    """Invalid or too expensive expression; the message is shown to the user"""
+
+
+class DiceTerm:
+    """One NdM group with its modifiers, or a constant when `sides` is 0"""
+
+    def __init__(
+        self,
+        sign: int,
+        count: int,
+        sides: int,
+        keep: Optional[Tuple[str, int]] = None,
+        explode: bool = False,
+        reroll: int = 0,
+        notation: str = ""
+    ):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.keep = keep  # ("h" | "l", how many dice are kept)
+        self.explode = explode
+        self.reroll = reroll
+        self.notation = notation
+
+    @property
+    def is_constant(self) -> bool:
+        return self.sides == 0
+
+
+class TermRoll:
+    def __init__(self, term: DiceTerm, values: np.ndarray, kept: np.ndarray, subtotal: int):
+        self.term = term
+        self.values = values  # final value of every die (explosions included)
+        self.kept = kept  # boolean mask over values
+        self.subtotal = subtotal  # signed contribution to the total
+
+
+class RollResult:
+    def __init__(self, terms: List[TermRoll], explosions_capped: bool):
+        self.terms = terms
+        self.total = sum(roll.subtotal for roll in terms)
+        self.explosions_capped = explosions_capped
+
+
+def _parse_modifiers(term: DiceTerm, text: str):
+    for name, digits in MODIFIER_RE.findall(text):
+        if name == "!":
+            if digits or term.explode:
+                raise DiceError("Usa `!` uma só vez e sem número.")
+            if term.sides < 2:
+                raise DiceError("Só dados com 2 ou mais lados podem explodir.")
+            term.explode = True
+        elif name == "r":
+            if term.reroll:
+                raise DiceError("Usa só um `r` por grupo de dados.")
+            term.reroll = int(digits) if digits else 1
+            if not 1 <= term.reroll < term.sides:
+                raise DiceError(f"`r{term.reroll}` tem de ser menor do que o número de lados ({term.sides}).")
+        else:
+            if term.keep:
+                raise DiceError("Usa só um `kh`/`kl`/`dh`/`dl` por grupo de dados.")
+            n = int(digits) if digits else 1
+            if n > term.count:
+                raise DiceError(f"Não dá para guardar ou descartar {n} de {term.count} dados.")
+            if name in ("k", "kh"):
+                term.keep = ("h", n)
+            elif name == "kl":
+                term.keep = ("l", n)
+            elif name == "dh":
+                term.keep = ("l", term.count - n)
+            else:  # dl
+                term.keep = ("h", term.count - n)
+
+
+def parse(expression: str) -> List[DiceTerm]:
+    """Parse dice notation into terms, enforcing the complexity limits"""
+    text = "".join(expression.lower().split())
+    if not text:
+        raise DiceError("Expressão vazia.")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise DiceError(f"Expressão demasiado longa (máximo {MAX_EXPRESSION_LENGTH} caracteres).")
+    if text[0] not in "+-":
+        text = "+" + text
+
+    terms: List[DiceTerm] = []
+    position = 0
+    while position < len(text):
+        match = TERM_RE.match(text, position)
+        if not match:
+            raise DiceError(f"Não percebi `{text[position:].lstrip('+')}`. Exemplo: `4d6kh3+2`.")
+        position = match.end()
+        sign = -1 if match.group(1) == "-" else 1
+        notation = match.group(0).lstrip("+")
+        if match.group(5) is not None:
+            constant = int(match.group(5))
+            if constant > MAX_CONSTANT:
+                raise DiceError(f"Modificador demasiado grande (máximo {MAX_CONSTANT}).")
+            terms.append(DiceTerm(sign, constant, 0, notation=notation))
+        else:
+            count = int(match.group(2)) if match.group(2) else 1
+            sides = 100 if match.group(3) == "%" else int(match.group(3))
+            if count < 1 or sides < 1:
+                raise DiceError("Cada grupo precisa de pelo menos 1 dado com 1 lado.")
+            if sides > MAX_SIDES:
+                raise DiceError(f"Máximo de {MAX_SIDES} lados por dado.")
+            term = DiceTerm(sign, count, sides, notation=notation)
+            _parse_modifiers(term, match.group(0)[match.end(3) - match.start():])
+            terms.append(term)
+        if len(terms) > MAX_TERMS:
+            raise DiceError(f"Máximo de {MAX_TERMS} termos por expressão.")
+
+    if sum(term.count for term in terms if not term.is_constant) > MAX_DICE:
+        raise DiceError(f"Máximo de {MAX_DICE} dados por expressão.")
+    return terms
+
+
+def format_terms(terms: List[DiceTerm]) -> str:
+    """Terms back as normalised notation, e.g. "4d6kh3+2" """
+    text = "".join(("-" if term.sign < 0 else "+") + term.notation.lstrip("-") for term in terms)
+    return text.lstrip("+")
+
+
+def _kept_mask(values: np.ndarray, keep: Optional[Tuple[str, int]]) -> np.ndarray:
+    kept = np.ones(len(values), dtype=bool)
+    if keep:
+        order = np.argsort(values, kind="stable")
+        dropped = order[:len(values) - keep[1]] if keep[0] == "h" else order[keep[1]:]
+        kept[dropped] = False
+    return kept
+
+
+def roll(terms: List[DiceTerm], rng: Optional[np.random.Generator] = None) -> RollResult:
+    """Roll every term with whole-array operations (10000d6 is one numpy call, not 10000)"""
+    rng = rng or np.random.default_rng()
+    explosions_left = MAX_EXPLOSIONS
+    capped = False
+    rolls: List[TermRoll] = []
+    for term in terms:
+        if term.is_constant:
+            rolls.append(TermRoll(term, np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), term.sign * term.count))
+            continue
+        values = rng.integers(1, term.sides + 1, size=term.count)
+        if term.reroll:
+            rerolled = np.flatnonzero(values <= term.reroll)
+            values[rerolled] = rng.integers(1, term.sides + 1, size=len(rerolled))
+        if term.explode:
+            live = np.flatnonzero(values == term.sides)
+            while len(live):
+                if len(live) > explosions_left:
+                    live, capped = live[:explosions_left], True
+                if not len(live):
+                    break
+                explosions_left -= len(live)
+                extra = rng.integers(1, term.sides + 1, size=len(live))
+                values[live] += extra
+                live = live[extra == term.sides]
+        kept = _kept_mask(values, term.keep)
+        rolls.append(TermRoll(term, values, kept, term.sign * int(values[kept].sum())))
+    return RollResult(rolls, capped)
+
+
+class Distribution:
+    """Exact probability of every total: probs[i] is P(total == offset + i)"""
+
+    def __init__(self, offset: int, probs: np.ndarray):
+        self.offset = offset
+        self.probs = probs
+
+    @property
+    def minimum(self) -> int:
+        return self.offset + int(np.flatnonzero(self.probs > 0)[0])
+
+    @property
+    def maximum(self) -> int:
+        return self.offset + int(np.flatnonzero(self.probs > 0)[-1])
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.offset, self.offset + len(self.probs))
+
+    @property
+    def mean(self) -> float:
+        return float(self.values @ self.probs)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(float((self.values - self.mean) ** 2 @ self.probs), 0.0))
+
+    @property
+    def mode(self) -> int:
+        return self.offset + int(self.probs.argmax())
+
+    def percentile(self, q: float) -> int:
+        """Smallest total whose cumulative probability reaches q"""
+        index = int(np.searchsorted(np.cumsum(self.probs), q - 1e-12))
+        return self.offset + min(index, len(self.probs) - 1)
+
+    def at_least(self, total: int) -> float:
+        index = max(total - self.offset, 0)
+        return float(self.probs[index:].sum())
+
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Polynomial product of two probability vectors (FFT once direct convolution gets expensive)"""
+    if len(a) * len(b) <= 1_000_000:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    n = 1 << (size - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:size]
+    return np.clip(result, 0.0, None)
+
+
+def _power(probs: np.ndarray, count: int) -> np.ndarray:
+    """probs convolved with itself `count` times, by repeated squaring"""
+    result = np.ones(1)
+    while count:
+        if count & 1:
+            result = _convolve(result, probs)
+        count >>= 1
+        if count:
+            probs = _convolve(probs, probs)
+    return result
+
+
+def bounds(terms: List[DiceTerm]) -> Tuple[float, float]:
+    """Lowest and highest possible totals (inf when a term explodes)"""
+    low = high = 0.0
+    for term in terms:
+        if term.is_constant:
+            low, high = low + term.sign * term.count, high + term.sign * term.count
+            continue
+        dice = term.keep[1] if term.keep else term.count
+        term_high = math.inf if term.explode and dice else dice * term.sides
+        if term.sign > 0:
+            low, high = low + dice, high + term_high
+        else:
+            low, high = low - term_high, high - dice
+    return low, high
+
+
+def _explode_depth(sides: int) -> int:
+    return max(1, math.ceil(math.log(1 / STATS_EXPLODE_TAIL, sides)))
+
+
+def _die_distribution(term: DiceTerm) -> Tuple[int, np.ndarray]:
+    """Single die of a term, with reroll and explosion applied: (lowest value, probabilities)"""
+    sides = term.sides
+    base = np.full(sides, 1.0 / sides)
+    if term.reroll:
+        chance = term.reroll / sides
+        base = base * chance + np.where(np.arange(1, sides + 1) > term.reroll, 1.0 / sides, 0.0)
+    if not term.explode:
+        return 1, base
+    # A maximum roll adds another (exploding) die: M + k*M + r with k further maxima
+    depth = _explode_depth(sides)
+    probs = np.zeros(sides * (depth + 1))
+    probs[:sides - 1] = base[:sides - 1]
+    chain = base[-1]
+    for k in range(1, depth + 1):
+        probs[k * sides:k * sides + sides - 1] = chain / sides
+        chain /= sides
+    return 1, probs
+
+
+def _keep_distribution(term: DiceTerm, die: np.ndarray) -> np.ndarray:
+    """Sum of the kept dice, counting how many dice land on each face from the best face down
+
+    state[c][s] is the probability that c dice (c < kept) landed on the faces seen so
+    far with sum s. Of the n dice still unplaced, Binomial(n, p_v / remaining mass)
+    land on face v; once the kept slots fill up the rest no longer change the sum,
+    so those states move to `done`. Binomials are built in log space and never overflow.
+    """
+    count, (side, kept) = term.count, term.keep
+    faces = np.flatnonzero(die)  # value - 1 of every possible face
+    if side == "h":
+        faces = faces[::-1]
+    width = kept * (int(faces.max()) + 1) + 1
+    if len(faces) * kept > STATS_MAX_KEEP_STEPS or len(faces) * kept * kept * width > STATS_MAX_KEEP_WORK:
+        raise DiceError("Demasiados dados com `kh`/`kl`/`dh`/`dl` para calcular a distribuição exata.")
+
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, count + 1)))))
+    remaining = np.cumsum(die[faces][::-1])[::-1]  # mass of this face and every later one
+    unplaced = count - np.arange(kept)  # dice left for each state row
+    j = np.arange(kept)
+    valid = j[None, :] <= unplaced[:, None]
+    log_choose = np.where(
+        valid,
+        log_factorial[unplaced][:, None] - log_factorial[j][None, :]
+        - log_factorial[np.maximum(unplaced[:, None] - j[None, :], 0)],
+        -np.inf
+    )
+
+    state = np.zeros((kept, width))
+    state[0, 0] = 1.0
+    done = np.zeros(width)
+    for face, mass in zip(faces, remaining):
+        value = int(face) + 1
+        q = min(float(die[face] / mass), 1.0) if mass > 0 else 1.0
+        # pmf[c, j]: j of the dice left in row c land on this face (j < kept)
+        if q >= 1.0:
+            pmf = (j[None, :] == unplaced[:, None]).astype(float)
+        else:
+            with np.errstate(divide="ignore"):
+                log_q, log_miss = math.log(q) if q > 0 else -np.inf, math.log1p(-q)
+            exponent = np.where(valid, np.maximum(unplaced[:, None] - j[None, :], 0), 0)
+            with np.errstate(invalid="ignore"):
+                pmf = np.exp(log_choose + j[None, :] * log_q + exponent * log_miss)
+            pmf = np.nan_to_num(np.where(valid, pmf, 0.0))
+            if q == 0:
+                pmf[:, 0] = 1.0
+        # Rows that reach `kept` dice or more: the rest of the slots fill with this face
+        fills = np.clip(1.0 - np.cumsum(pmf, axis=1)[np.arange(kept), kept - 1 - np.arange(kept)], 0.0, 1.0)
+        new_state = np.zeros_like(state)
+        for placed in range(kept):
+            if fills[placed] > 0:
+                shift = (kept - placed) * value
+                done[shift:] += state[placed, :width - shift] * fills[placed]
+        for step in range(kept):
+            shift = step * value
+            new_state[step:, shift:] += state[:kept - step, :width - shift] * pmf[:kept - step, step, None]
+        state = new_state
+    return done
+
+
+def distribution(terms: List[DiceTerm]) -> Distribution:
+    """Exact distribution of the total, built by polynomial convolution of the terms"""
+    span = 0
+    for term in terms:
+        if not term.is_constant:
+            per_die = term.sides * (_explode_depth(term.sides) + 1 if term.explode else 1)
+            span += (term.keep[1] if term.keep else term.count) * per_die
+    if span > STATS_MAX_OUTCOMES:
+        raise DiceError("Demasiados resultados possíveis para calcular a distribuição exata.")
+
+    offset, probs = 0, np.ones(1)
+    for term in terms:
+        if term.is_constant:
+            offset += term.sign * term.count
+            continue
+        low, die = _die_distribution(term)
+        if term.keep and term.keep[1] < term.count:
+            kept = term.keep[1]
+            if kept == 0:
+                continue
+            term_probs = _keep_distribution(term, die)
+            term_offset = 0
+        else:
+            kept = term.count
+            term_probs = _power(die, kept)
+            term_offset = low * kept
+        if term.sign < 0:
+            term_offset = -(term_offset + len(term_probs) - 1)
+            term_probs = term_probs[::-1]
+        offset += term_offset
+        probs = _convolve(probs, term_probs)
+
+    nonzero = np.flatnonzero(probs > 0)
+    probs = probs[nonzero[0]:nonzero[-1] + 1]
+    offset += int(nonzero[0])
+    return Distribution(offset, probs / probs.sum())
@@ -0,0 +1,185 @@
+"""
+Global budget for the FFmpeg processes spawned by the music cog
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+
+COPY = "copy"
+TRANSCODE = "transcode"
+
+
+class FFmpegJob:
+    """One admitted FFmpeg process (codec copy or transcode)"""
+
+    def __init__(self, guild_id: int, kind: str, duration: Optional[float] = None):
+        self.guild_id = guild_id
+        self.kind = kind
+        self.started = time.monotonic()
+        self.expected_end = self.started + duration if duration else None
+        self.pid: Optional[int] = None
+        self.process: Optional[subprocess.Popen] = None  # set once the source has spawned FFmpeg
+        self._last_sample: Optional[Tuple[float, float]] = None  # (cpu seconds, wall time)
+
+    def sample(self) -> Dict[str, Optional[float]]:
+        """CPU percentage since the previous sample and resident memory, read from /proc"""
+        if not self.pid:
+            return {"cpu": None, "rss_mb": None}
+        try:
+            with open(f"/proc/{self.pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{self.pid}/statm", "r") as f:
+                rss_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            return {"cpu": None, "rss_mb": None}
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        now = time.monotonic()
+        last_cpu, last_time = self._last_sample or (0.0, self.started)
+        self._last_sample = (cpu_seconds, now)
+        elapsed = now - last_time
+        cpu = (cpu_seconds - last_cpu) / elapsed * 100 if elapsed > 0 else 0.0
+        return {"cpu": cpu, "rss_mb": rss_pages * os.sysconf("SC_PAGE_SIZE") / 1048576}
+
+
+class FFmpegBudget:
+    """Caps concurrent FFmpeg processes; transcodes have a tighter cap and wait behind copies"""
+
+    def __init__(self, max_processes: int, max_transcodes: int):
+        self.max_processes = max(1, max_processes)
+        self.max_transcodes = max(1, min(max_transcodes, self.max_processes))
+        self.jobs: List[FFmpegJob] = []
+        self._waiters: List[Tuple[str, int, Optional[float], asyncio.Future]] = []
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _count(self, kind: Optional[str] = None) -> int:
+        return sum(1 for job in self.jobs if kind is None or job.kind == kind)
+
+    def _can_admit(self, kind: str) -> bool:
+        if len(self.jobs) >= self.max_processes:
+            return False
+        return kind != TRANSCODE or self._count(TRANSCODE) < self.max_transcodes
+
+    def _admit(self, guild_id: int, kind: str, duration: Optional[float]) -> FFmpegJob:
+        job = FFmpegJob(guild_id, kind, duration)
+        self.jobs.append(job)
+        self.admitted += 1
+        return job
+
+    def try_acquire(self, guild_id: int, kind: str, duration: Optional[float] = None) -> Optional[FFmpegJob]:
+        """Admit a job immediately, or return None when the budget is exhausted"""
+        # Waiting jobs of the same priority go first
+        if self._can_admit(kind) and not any(w[0] == kind or w[0] == COPY for w in self._waiters):
+            return self._admit(guild_id, kind, duration)
+        return None
+
+    async def acquire(
+        self,
+        guild_id: int,
+        kind: str,
+        duration: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[FFmpegJob]:
+        """Wait for a slot; returns None if none frees up within `timeout` seconds"""
+        job = self.try_acquire(guild_id, kind, duration)
+        if job:
+            return job
+        future = asyncio.get_running_loop().create_future()
+        waiter = (kind, guild_id, duration, future)
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return future.result()
+            self.rejected += 1
+            return None
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if not future.done():
+                future.cancel()
+
+    def release(self, job: FFmpegJob):
+        """Free a job's slot and admit waiting jobs, copies before transcodes"""
+        if job in self.jobs:
+            self.jobs.remove(job)
+        for kind in (COPY, TRANSCODE):
+            for waiter in [w for w in self._waiters if w[0] == kind]:
+                if not self._can_admit(kind):
+                    break
+                _, guild_id, duration, future = waiter
+                self._waiters.remove(waiter)
+                if future.done():
+                    continue
+                future.set_result(self._admit(guild_id, kind, duration))
+
+    def jobs_for(self, guild_id: int) -> List[FFmpegJob]:
+        return [job for job in self.jobs if job.guild_id == guild_id]
+
+    def eta(self, kind: str) -> Optional[float]:
+        """Estimated seconds until a new job of this kind would be admitted (None if unknown)"""
+        if self._can_admit(kind) and not self._waiters:
+            return 0.0
+        if kind == TRANSCODE and len(self.jobs) < self.max_processes:
+            blocking = [job for job in self.jobs if job.kind == TRANSCODE]
+        else:
+            blocking = list(self.jobs)
+        ahead = sum(1 for w in self._waiters if w[0] == COPY or w[0] == kind)
+        ends = sorted(job.expected_end for job in blocking if job.expected_end)
+        if ahead >= len(ends):
+            return None
+        return max(0.0, ends[ahead] - time.monotonic())
+
+    def usage(self) -> Dict[str, Any]:
+        samples = [job.sample() for job in self.jobs]
+        return {
+            "processes": len(self.jobs),
+            "transcodes": self._count(TRANSCODE),
+            "max_processes": self.max_processes,
+            "max_transcodes": self.max_transcodes,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "cpu": sum(s["cpu"] or 0.0 for s in samples),
+            "rss_mb": sum(s["rss_mb"] or 0.0 for s in samples),
+        }
+
+
+class BudgetedSource(discord.AudioSource):
+    """Wraps an FFmpeg source and returns its budget slot when playback cleans it up"""
+
+    def __init__(self, original: discord.AudioSource, budget: FFmpegBudget, job: FFmpegJob, loop: asyncio.AbstractEventLoop):
+        self.original = original
+        self.budget = budget
+        self.job = job
+        self.loop = loop
+        self._released = False
+        process = getattr(original, "_process", None)
+        job.process = process if isinstance(process, subprocess.Popen) else None
+        job.pid = getattr(process, "pid", None)
+
+    def read(self) -> bytes:
+        return self.original.read()
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        self.original.cleanup()
+        if not self._released:
+            self._released = True
+            # Called from the audio player thread
+            try:
+                self.loop.call_soon_threadsafe(self.budget.release, self.job)
+            except RuntimeError:
+                logging.warning("Event loop closed before releasing FFmpeg slot")
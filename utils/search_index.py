@@ -0,0 +1,110 @@
+"""
+In-memory search helpers for music autocomplete
+"""
+
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def normalize_query(text: str) -> str:
+    """Casefolded, accent-free, single-spaced text used as an index key"""
+    nfd = unicodedata.normalize("NFD", text.casefold())
+    stripped = "".join(char for char in nfd if unicodedata.category(char) != "Mn")
+    return " ".join(stripped.split())
+
+
+class PrefixIndex:
+    """Sorted index of track titles answering prefix queries with bisect
+
+    Every word of a title starts its own key, so "never gonna" finds
+    "Rick Astley - Never Gonna Give You Up". The least recently added
+    tracks are dropped once `max_tracks` is reached.
+    """
+
+    def __init__(self, max_tracks: int = 2000):
+        self.max_tracks = max_tracks
+        self.tracks: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()  # {url: (title, keys)}, least recent first
+        self._keys: List[Tuple[str, str]] = []  # sorted (key, url)
+        self._stamps: Dict[str, int] = {}
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def add(self, title: Optional[str], url: Optional[str]):
+        if not title or not url:
+            return
+        self._clock += 1
+        self._stamps[url] = self._clock
+        if url in self.tracks:
+            self.tracks.move_to_end(url)
+            return
+        words = normalize_query(title).split()
+        keys = [" ".join(words[i:]) for i in range(len(words))]
+        for key in keys:
+            insort(self._keys, (key, url))
+        self.tracks[url] = (title, keys)
+        while len(self.tracks) > self.max_tracks:
+            self._remove(*self.tracks.popitem(last=False))
+
+    def _remove(self, url: str, entry: Tuple[str, List[str]]):
+        self._stamps.pop(url, None)
+        for key in entry[1]:
+            i = bisect_left(self._keys, (key, url))
+            if i < len(self._keys) and self._keys[i] == (key, url):
+                del self._keys[i]
+
+    def search(self, prefix: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """(title, url) of tracks with a word sequence starting with `prefix`, most recent first"""
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return [(self.tracks[url][0], url) for url in islice(reversed(self.tracks), limit)]
+        found = set()
+        i = bisect_left(self._keys, (prefix, ""))
+        # Collect a few extra matches so recency ordering has something to choose from
+        while i < len(self._keys) and self._keys[i][0].startswith(prefix) and len(found) < limit * 4:
+            found.add(self._keys[i][1])
+            i += 1
+        urls = sorted(found, key=self._stamps.__getitem__, reverse=True)[:limit]
+        return [(self.tracks[url][0], url) for url in urls]
+
+
+class TTLCache:
+    """Small LRU mapping whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int = 500):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
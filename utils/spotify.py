@@ -0,0 +1,128 @@
+"""
+Minimal Spotify Web API client (client credentials flow) for resolving music links
+"""
+
+import asyncio
+import base64
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+SPOTIFY_URL_RE = re.compile(
+    r"(?:https?://open\.spotify\.com/(?:intl-[a-z-]+/)?|spotify:)(track|album|playlist)[/:]([A-Za-z0-9]{22})"
+)
+
+
+def parse_spotify_url(url: str) -> Optional[Tuple[str, str]]:
+    """Return (kind, id) for Spotify track, album and playlist links or URIs"""
+    match = SPOTIFY_URL_RE.search(url.strip())
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+class SpotifyError(Exception):
+    pass
+
+
+class SpotifyClient:
+    """Fetches track metadata; base URLs are configurable so a local stub can stand in for Spotify"""
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        api_base: str = "https://api.spotify.com/v1",
+        accounts_base: str = "https://accounts.spotify.com",
+        max_tracks: int = 100
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = api_base.rstrip("/")
+        self.accounts_base = accounts_base.rstrip("/")
+        self.max_tracks = max_tracks
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _get_token(self) -> str:
+        async with self._token_lock:
+            if self._token and time.monotonic() < self._token_expires:
+                return self._token
+            credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            async with self._get_session().post(
+                f"{self.accounts_base}/api/token",
+                data={"grant_type": "client_credentials"},
+                headers={"Authorization": f"Basic {credentials}"},
+            ) as resp:
+                if resp.status != 200:
+                    raise SpotifyError(f"Spotify authentication failed (HTTP {resp.status})")
+                data = await resp.json()
+            self._token = data["access_token"]
+            # Refresh a minute early so a token never expires mid-request
+            self._token_expires = time.monotonic() + data.get("expires_in", 3600) - 60
+            return self._token
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.api_base}{url}"
+        for attempt in range(2):
+            token = await self._get_token()
+            async with self._get_session().get(url, params=params, headers={"Authorization": f"Bearer {token}"}) as resp:
+                if resp.status == 401 and attempt == 0:
+                    self._token = None
+                    continue
+                if resp.status == 429 and attempt == 0:
+                    await asyncio.sleep(min(float(resp.headers.get("Retry-After", "1")), 5))
+                    continue
+                if resp.status == 404:
+                    raise SpotifyError("Spotify link not found (it may be private)")
+                if resp.status != 200:
+                    raise SpotifyError(f"Spotify API error (HTTP {resp.status})")
+                return await resp.json()
+        raise SpotifyError("Spotify API unavailable")
+
+    @staticmethod
+    def _track_info(item: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not item or not item.get("id") or item.get("type", "track") != "track":
+            return None
+        return {
+            "spotify_id": item["id"],
+            "title": item.get("name", "Unknown"),
+            "artists": ", ".join(a.get("name", "") for a in item.get("artists") or [] if a.get("name")),
+            "duration": (item.get("duration_ms") or 0) / 1000 or None,
+        }
+
+    async def _paged(self, url: str, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        tracks: List[Dict[str, Any]] = []
+        page: Optional[Dict[str, Any]] = await self._get(url, {"limit": 50})
+        while page and len(tracks) < self.max_tracks:
+            for item in page.get("items") or []:
+                info = self._track_info(item.get(key) if key else item)
+                if info:
+                    tracks.append(info)
+            page = await self._get(page["next"]) if page.get("next") else None
+        return tracks[: self.max_tracks]
+
+    async def get_tracks(self, kind: str, spotify_id: str) -> List[Dict[str, Any]]:
+        """Tracks of a Spotify track, album or playlist (local and unavailable tracks are skipped)"""
+        if kind == "track":
+            info = self._track_info(await self._get(f"/tracks/{spotify_id}"))
+            return [info] if info else []
+        if kind == "album":
+            return await self._paged(f"/albums/{spotify_id}/tracks")
+        if kind == "playlist":
+            return await self._paged(f"/playlists/{spotify_id}/tracks", key="track")
+        raise SpotifyError(f"Unsupported Spotify link type: {kind}")
@@ -0,0 +1,124 @@
+"""
+Compact guess dictionary for Termo
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List
+
+
+def normalize_word(word: str) -> str:
+    """Lowercase word without accents ("Preço" -> "preco")"""
+    nfd = unicodedata.normalize("NFD", word.strip().casefold())
+    return "".join(char for char in nfd if unicodedata.category(char) != "Mn")
+
+
+class PackedWords:
+    """Sorted fixed-width ASCII words packed into one bytes object and searched with bisect
+
+    6000 five-letter words take 30 KB instead of the few hundred KB a set of str would.
+    """
+
+    def __init__(self, words: Iterable[str], size: int):
+        self.size = size
+        ordered = sorted({word for word in words if len(word) == size and word.isascii()})
+        self._data = "".join(ordered).encode("ascii")
+
+    def __len__(self) -> int:
+        return len(self._data) // self.size
+
+    def __getitem__(self, index: int) -> bytes:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start = index * self.size
+        return self._data[start:start + self.size]
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index].decode("ascii")
+
+    def index(self, word: str) -> int:
+        """Position of a word in sorted order, or -1"""
+        if len(word) != self.size or not word.isascii():
+            return -1
+        key = word.encode("ascii")
+        index = bisect_left(self, key)
+        return index if index < len(self) and self[index] == key else -1
+
+    def __contains__(self, word: str) -> bool:
+        return self.index(word) >= 0
+
+
+class AnswerList:
+    """Answer words of one length as written (for display) and normalised (for scoring)"""
+
+    def __init__(self, words: Iterable[str], size: int):
+        accepted = [word.strip() for word in words if len(normalize_word(word)) == size]
+        self.words: List[str] = [word.upper() for word in accepted]
+        self.normalized: List[str] = [normalize_word(word) for word in accepted]
+        # Identifies this exact list, so state built on its order can tell when it changed
+        self.digest = hashlib.sha1("\n".join(accepted).encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+class TermoDictionary:
+    """Answers and valid guesses per word length, each length loaded from its own files on first use"""
+
+    def __init__(self, path_template: str, answers_template: str):
+        self.path_template = path_template  # e.g. "data/termo_dicionario_{}.txt"
+        self.answers_template = answers_template  # e.g. "data/termo_palavras_{}.json"
+        self._answers: Dict[int, AnswerList] = {}
+        self._buckets: Dict[int, PackedWords] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, size: int):
+        with self._lock:
+            if size in self._buckets:
+                return
+            answers = AnswerList(self._read_answers(size), size)
+            path = self.path_template.format(size)
+            # Answers are always valid guesses, even when missing from the dictionary file
+            words = list(answers.normalized)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    words.extend(normalize_word(line) for line in f if line.strip() and not line.startswith("#"))
+            else:
+                logging.warning("Termo dictionary not found at %s; only answer words are accepted", path)
+            bucket = PackedWords(words, size)
+            self._answers[size] = answers
+            self._buckets[size] = bucket
+            logging.info("Loaded %s answers and %s valid %s-letter Termo words", len(answers), len(bucket), size)
+
+    def _read_answers(self, size: int) -> List[str]:
+        path = self.answers_template.format(size)
+        if not os.path.exists(path):
+            logging.warning("Termo word list not found at %s", path)
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            logging.exception("Failed to load Termo words from %s", path)
+            return []
+
+    def answers(self, size: int) -> AnswerList:
+        if size not in self._answers:
+            self._load(size)
+        return self._answers[size]
+
+    def bucket(self, size: int) -> PackedWords:
+        if size not in self._buckets:
+            self._load(size)
+        return self._buckets[size]
+
+    def is_valid(self, word: str) -> bool:
+        """Accent-insensitive membership check, O(log n)"""
+        word = normalize_word(word)
+        return word in self.bucket(len(word))
@@ -0,0 +1,149 @@
+"""
+Termo hint and analysis engine backed by a precomputed feedback matrix
+"""
+
+import hashlib
+import logging
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.termo_dictionary import PackedWords, normalize_word
+
+GRAY, YELLOW, GREEN = 0, 1, 2
+EMOJI_VALUES = {"⬜": GRAY, "🟨": YELLOW, "🟩": GREEN}
+MATRIX_VERSION = 1
+BUILD_CHUNK = 512  # guesses scored per vectorised block
+
+
+def encode_result(result: Sequence[str]) -> int:
+    """Feedback emojis as a base-3 pattern code (position i is digit i; 0..3^n-1)"""
+    return sum(EMOJI_VALUES[mark] * 3 ** i for i, mark in enumerate(result))
+
+
+def _letters(words: Sequence[str]) -> np.ndarray:
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1)
+
+
+def pattern_dtype(size: int) -> type:
+    """Smallest unsigned type holding 3^size pattern codes (uint8 up to five letters)"""
+    return np.uint8 if 3 ** size <= 256 else np.uint16
+
+
+def feedback_matrix(guesses: Sequence[str], answers: Sequence[str]) -> np.ndarray:
+    """Pattern code of every (guess, answer) pair, with Termo's duplicate-letter rules"""
+    size = len(guesses[0])
+    answer_letters = _letters(answers)[None, :, :]  # (1, m, size)
+    weights = (3 ** np.arange(size)).astype(np.uint16)
+    matrix = np.empty((len(guesses), len(answers)), dtype=pattern_dtype(size))
+    for start in range(0, len(guesses), BUILD_CHUNK):
+        guess_letters = _letters(guesses[start:start + BUILD_CHUNK])[:, None, :]  # (c, 1, size)
+        green = guess_letters == answer_letters  # (c, m, size)
+        yellow = np.zeros_like(green)
+        for i in range(size):
+            letter = guess_letters[:, :, i:i + 1]
+            # Copies of this letter in the answer that are not already green...
+            available = ((answer_letters == letter) & ~green).sum(axis=2)
+            # ...minus those taken by earlier yellows of the same letter in the guess
+            used = ((guess_letters[:, :, :i] == letter) & yellow[:, :, :i]).sum(axis=2)
+            yellow[:, :, i] = ~green[:, :, i] & (available > used)
+        codes = (green * 2 + yellow).astype(np.uint16) @ weights
+        matrix[start:start + len(codes)] = codes
+    return matrix
+
+
+class TermoSolver:
+    """Filters candidates and ranks guesses by expected information (entropy)
+
+    Rows are every valid guess, columns every answer; the matrix is cached on
+    disk under a hash of both word lists so it is only rebuilt when they change.
+    """
+
+    def __init__(self, guesses: PackedWords, answers: Sequence[str], cache_dir: str):
+        self.guesses = guesses
+        self.size = guesses.size
+        self.answers = sorted({normalize_word(word) for word in answers if len(normalize_word(word)) == self.size})
+        self.answer_rows = np.array([self.index(word) for word in self.answers])
+        if (self.answer_rows < 0).any():
+            raise ValueError("Every answer must be a valid guess")
+        digest = hashlib.sha1(guesses._data + b"|" + "".join(self.answers).encode("ascii")).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"termo_matrix_v{MATRIX_VERSION}_{self.size}_{digest}.npy")
+        self.matrix = self._load_matrix()
+        self._opening: Optional[Tuple[str, float]] = None
+
+    def _load_matrix(self) -> np.ndarray:
+        expected = (len(self.guesses), len(self.answers))
+        if os.path.exists(self.cache_path):
+            try:
+                matrix = np.load(self.cache_path)
+                if matrix.shape == expected and matrix.dtype == pattern_dtype(self.size):
+                    return matrix
+            except (OSError, ValueError):
+                logging.exception("Discarding unreadable Termo matrix cache %s", self.cache_path)
+        matrix = feedback_matrix(list(self.guesses), self.answers)
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp.npy"
+            np.save(tmp_path, matrix)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            logging.exception("Failed to cache Termo matrix at %s", self.cache_path)
+        logging.info("Built %sx%s Termo feedback matrix", *matrix.shape)
+        return matrix
+
+    def index(self, word: str) -> int:
+        return self.guesses.index(normalize_word(word))
+
+    def candidates(self, history: Sequence[Tuple[str, int]]) -> np.ndarray:
+        """Answer columns consistent with every (guess, pattern code) so far"""
+        mask = np.ones(len(self.answers), dtype=bool)
+        for word, code in history:
+            row = self.index(word)
+            if row >= 0:
+                mask &= self.matrix[row] == code
+        return np.flatnonzero(mask)
+
+    def entropies(self, candidates: np.ndarray) -> np.ndarray:
+        """Expected information in bits of every guess against the candidate set
+
+        Each row's patterns are sorted and counted as runs, so memory stays at
+        guesses x candidates instead of guesses x 3^size counters (3^7 = 2187).
+        """
+        rows, n = len(self.guesses), len(candidates)
+        patterns = np.sort(self.matrix[:, candidates], axis=1)
+        starts = np.ones(patterns.shape, dtype=bool)
+        starts[:, 1:] = patterns[:, 1:] != patterns[:, :-1]
+        positions = np.flatnonzero(starts)
+        p = np.diff(np.append(positions, rows * n)) / n
+        return -np.bincount(positions // n, weights=p * np.log2(p), minlength=rows)
+
+    def best_guess(self, candidates: np.ndarray) -> Tuple[str, float]:
+        """Highest-entropy guess; possible answers win ties so the guess can also be the solution"""
+        if len(candidates) <= 2:
+            return self.answers[candidates[0]], float(len(candidates) == 2)
+        full = len(candidates) == len(self.answers)
+        if full and self._opening:
+            return self._opening
+        scores = self.entropies(candidates)
+        scores[self.answer_rows[candidates]] += 1e-6
+        row = int(scores.argmax())
+        result = (self.guesses[row].decode("ascii"), float(scores[row]))
+        if full:
+            self._opening = result
+        return result
+
+    def solve(self, answer: str, max_guesses: int = 10) -> List[str]:
+        """Guesses the greedy solver makes to find `answer`"""
+        answer = normalize_word(answer)
+        column = self.answers.index(answer)
+        path: List[str] = []
+        candidates = np.arange(len(self.answers))
+        while len(path) < max_guesses:
+            guess, _ = self.best_guess(candidates)
+            path.append(guess)
+            if guess == answer:
+                break
+            row = self.index(guess)
+            candidates = candidates[self.matrix[row, candidates] == self.matrix[row, column]]
+        return path